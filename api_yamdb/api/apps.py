@@ -3,3 +3,14 @@ from django.apps import AppConfig
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        from django.conf import settings
+        from django.core.signals import request_started
+
+        from api_yamdb.db import check_connections
+
+        from . import signals  # noqa: F401
+
+        if settings.DB_CONN_HEALTH_CHECKS:
+            request_started.connect(check_connections)
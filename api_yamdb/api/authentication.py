@@ -0,0 +1,101 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import F
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import (
+    JWTAuthentication, JWTTokenUserAuthentication)
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import User
+
+VERSION_CLAIM = 'token_version'
+
+_versions = OrderedDict()
+_lock = threading.Lock()
+
+
+def issue_token(user):
+    """
+    Токен доступа с данными, которых достаточно для проверки прав
+    без обращения к таблице пользователей
+    """
+    token = AccessToken.for_user(user)
+    token['username'] = user.username
+    token['role'] = user.role
+    token['is_superuser'] = user.is_superuser
+    token[VERSION_CLAIM] = user.token_version
+    return token
+
+
+def revoke_tokens(user_id):
+    """
+    Отзывает все выпущенные токены пользователя. Версия хранится в его
+    строке в БД, поэтому отзыв не вытесняется из кэша и сразу общий для
+    всех процессов; другие процессы увидят его не позже чем через
+    JWT_REVOCATION_TTL секунд
+    """
+    User.objects.filter(pk=user_id).update(
+        token_version=F('token_version') + 1)
+    with _lock:
+        _versions.pop(user_id, None)
+
+
+def get_token_version(user_id):
+    """
+    Текущая версия токенов пользователя или None, если его нет.
+    Версии хранятся в LRU-кэше процесса на JWT_REVOCATION_CACHE_SIZE
+    пользователей
+    """
+    now = time.monotonic()
+    with _lock:
+        checked_at, version = _versions.get(user_id, (None, None))
+        if (checked_at is not None
+                and now - checked_at <= settings.JWT_REVOCATION_TTL):
+            _versions.move_to_end(user_id)
+            return version
+    version = User.objects.filter(pk=user_id).values_list(
+        'token_version', flat=True).first()
+    with _lock:
+        _versions[user_id] = (now, version)
+        _versions.move_to_end(user_id)
+        while len(_versions) > settings.JWT_REVOCATION_CACHE_SIZE:
+            _versions.popitem(last=False)
+    return version
+
+
+def get_user_instance(user):
+    """
+    Модель пользователя для запросов, которым нужна запись из БД
+    """
+    if isinstance(user, User):
+        return user
+    return User.objects.get(pk=user.pk)
+
+
+class RoleTokenUser(TokenUser):
+
+    @cached_property
+    def role(self):
+        return self.token.get('role', User.USER)
+
+
+class StatelessJWTAuthentication(JWTTokenUserAuthentication):
+    """
+    Пользователь восстанавливается из утверждений токена. Версия токенов
+    пользователя читается из БД не чаще раза в JWT_REVOCATION_TTL секунд
+    на процесс. Токены без версии (выпущенные раньше) проверяются по БД,
+    отозванные после смены роли, блокировки или удаления — отклоняются
+    """
+
+    def get_user(self, validated_token):
+        if VERSION_CLAIM not in validated_token:
+            return JWTAuthentication.get_user(self, validated_token)
+        user = RoleTokenUser(validated_token)
+        if get_token_version(user.id) != validated_token[VERSION_CLAIM]:
+            raise AuthenticationFailed(
+                'Токен отозван, получите новый', code='token_revoked')
+        return user
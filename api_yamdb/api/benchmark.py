@@ -0,0 +1,217 @@
+"""
+Замер основных эндпоинтов v1 тестовым клиентом DRF внутри процесса:
+перцентили задержки, запросы к БД на ответ и пропускная способность
+"""
+import json
+import math
+import statistics
+import time
+
+from django.db import connection
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from reviews.leaderboards import refresh_leaderboards
+from reviews.models import Category, Genre, Review, Title, User
+
+from .authentication import issue_token
+from .renderers import FastJSONRenderer
+from .serializers import ReviewSerializer, TitleGeneralSerializer
+
+SCENARIOS = (
+    ('titles', 'get', '/api/v1/titles/'),
+    ('titles-filtered', 'get',
+     '/api/v1/titles/?genre={genre}&category={category}'),
+    ('title', 'get', '/api/v1/titles/{title}/'),
+    ('title-stats', 'get', '/api/v1/titles/{title}/stats/'),
+    ('reviews', 'get', '/api/v1/titles/{title}/reviews/'),
+    ('reviews-expand', 'get', '/api/v1/titles/{title}/reviews/?expand=title'),
+    ('review', 'get', '/api/v1/titles/{title}/reviews/{review}/'),
+    ('comments', 'get', '/api/v1/titles/{title}/reviews/{review}/comments/'),
+    ('categories', 'get', '/api/v1/categories/'),
+    ('genres', 'get', '/api/v1/genres/'),
+    ('users', 'get', '/api/v1/users/'),
+    ('leaderboard', 'get', '/api/v1/leaderboards/top/'),
+    ('comment-create', 'post',
+     '/api/v1/titles/{title}/reviews/{review}/comments/'),
+)
+PAYLOADS = {
+    'comment-create': {'text': 'benchmark'},
+}
+RENDERERS = (JSONRenderer, FastJSONRenderer)
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+class QueryCounter:
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[max(math.ceil(percent / 100 * len(ordered)) - 1, 0)]
+
+
+def get_client():
+    """
+    Клиент администратора: ему доступны все эндпоинты прогона
+    """
+    admin, _ = User.objects.get_or_create(
+        username='bench_admin',
+        defaults={'email': 'bench_admin@yamdb.com', 'role': User.ADMIN})
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {issue_token(admin)}')
+    return client
+
+
+def get_targets():
+    review = Review.objects.order_by('title_id', 'pk').first()
+    if review is None:
+        raise BenchmarkError('В базе нет отзывов для прогона')
+    return {
+        'title': review.title_id,
+        'review': review.pk,
+        'category': Category.objects.values_list(
+            'slug', flat=True).order_by('pk').first(),
+        'genre': Genre.objects.values_list(
+            'slug', flat=True).order_by('pk').first(),
+    }
+
+
+def measure(client, method, url, data, requests, warmup):
+    send = getattr(client, method)
+    for _ in range(warmup):
+        send(url, data, format='json')
+    timings, queries = [], []
+    started = time.perf_counter()
+    for _ in range(requests):
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            start = time.perf_counter()
+            response = send(url, data, format='json')
+            timings.append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            raise BenchmarkError(
+                f'{method.upper()} {url}: {response.status_code}')
+        queries.append(counter.count)
+    total = time.perf_counter() - started
+    return {
+        'p50': percentile(timings, 50) * 1000,
+        'p95': percentile(timings, 95) * 1000,
+        'p99': percentile(timings, 99) * 1000,
+        'mean': statistics.mean(timings) * 1000,
+        'rps': requests / total,
+        'queries': max(queries),
+    }
+
+
+def run(requests=50, warmup=5, scenarios=None):
+    """
+    Прогоняет сценарии по уже заполненной базе. Время — в миллисекундах
+    """
+    refresh_leaderboards()
+    client = get_client()
+    targets = get_targets()
+    results = {}
+    for name, method, url in SCENARIOS:
+        if scenarios and name not in scenarios:
+            continue
+        results[name] = measure(
+            client, method, url.format(**targets), PAYLOADS.get(name),
+            requests, warmup)
+    return results
+
+
+def measure_rendering(rounds=50, size=100):
+    """
+    Медиана рендера страницы из size произведений (TitleGeneralSerializer)
+    и отзывов (ReviewSerializer) в JSON каждым из RENDERERS, в
+    миллисекундах. Ответы рендереров должны совпадать байт в байт
+    """
+    pages = {
+        'titles': TitleGeneralSerializer(
+            Title.objects.prefetch_related('genre').order_by('pk')[:size],
+            many=True).data,
+        'reviews': ReviewSerializer(
+            Review.objects.order_by('pk')[:size], many=True).data,
+    }
+    results = {}
+    for name, data in pages.items():
+        results[name], outputs = {}, set()
+        for renderer_class in RENDERERS:
+            renderer = renderer_class()
+            timings = []
+            for _ in range(rounds):
+                start = time.perf_counter()
+                output = renderer.render(data)
+                timings.append(time.perf_counter() - start)
+            outputs.add(output)
+            results[name][renderer_class.__name__] = (
+                statistics.median(timings) * 1000)
+        if len(outputs) != 1:
+            raise BenchmarkError(f'{name}: ответы рендереров различаются')
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Регрессии относительно базового прогона: рост медианы задержки
+    больше чем на threshold и любой рост числа запросов к БД
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result['queries'] > base['queries']:
+            regressions.append(
+                f'{name}: запросов к БД {result["queries"]} '
+                f'вместо {base["queries"]}')
+        if result['p50'] > base['p50'] * (1 + threshold):
+            regressions.append(
+                f'{name}: p50 {result["p50"]:.1f} мс '
+                f'вместо {base["p50"]:.1f} мс')
+    return regressions
+
+
+def format_results(results, baseline=None):
+    baseline = baseline or {}
+    lines = [
+        f'{"сценарий":<16}{"p50, мс":>10}{"p95, мс":>10}{"p99, мс":>10}'
+        f'{"запр/с":>10}{"SQL":>6}{"p50 базы":>10}',
+    ]
+    for name, result in results.items():
+        base = baseline.get(name)
+        lines.append(
+            f'{name:<16}{result["p50"]:>10.2f}{result["p95"]:>10.2f}'
+            f'{result["p99"]:>10.2f}{result["rps"]:>10.1f}'
+            f'{result["queries"]:>6}'
+            f'{format(base["p50"], ".2f") if base else "-":>10}')
+    return '\n'.join(lines)
+
+
+def format_rendering(results):
+    lines = [f'{"страница":<16}' + ''.join(
+        f'{renderer.__name__ + ", мс":>24}' for renderer in RENDERERS)]
+    for name, timings in results.items():
+        lines.append(f'{name:<16}' + ''.join(
+            f'{timings[renderer.__name__]:>24.3f}'
+            for renderer in RENDERERS))
+    return '\n'.join(lines)
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as source:
+        return json.load(source)
+
+
+def save_baseline(path, results):
+    with open(path, 'w', encoding='utf-8') as target:
+        json.dump(results, target, indent=2, sort_keys=True)
@@ -0,0 +1,183 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.response import Response
+
+MARKER_KEY = 'api:changed:{}'
+RESPONSE_KEY = 'api:response:{}'
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def set_markers(scopes):
+    now = time.time()
+    get_cache().set_many(
+        {MARKER_KEY.format(scope): now for scope in scopes}, timeout=None)
+
+
+def touch(*scopes):
+    """
+    Отмечает изменение данных: все ответы, закэшированные
+    для этих областей, становятся недействительными.
+    Отметка ставится сразу и повторно после коммита транзакции,
+    чтобы не закэшировать данные, прочитанные до коммита
+    """
+    set_markers(scopes)
+    transaction.on_commit(lambda: set_markers(scopes))
+
+
+def get_markers(scopes):
+    """
+    Время последнего изменения каждой области. Если отметка пропала
+    из кэша, изменение считается произошедшим сейчас
+    """
+    cache = get_cache()
+    keys = [MARKER_KEY.format(scope) for scope in scopes]
+    markers = cache.get_many(keys)
+    missing = [key for key in keys if key not in markers]
+    now = time.time()
+    if missing:
+        for key in missing:
+            cache.add(key, now, timeout=None)
+        markers.update(cache.get_many(missing))
+    # Кэш, который ничего не хранит (DummyCache), не даёт отметок:
+    # тогда ответы не переиспользуются
+    return [markers.get(key, now) for key in keys]
+
+
+def check_shared_cache(workers):
+    """
+    Отметки изменения и ответы хранятся в кэше API_CACHE_ALIAS. Если он
+    в памяти процесса, запись в одном воркере не сбрасывает отметки
+    других, и они отдают устаревшие ответы и 304
+    """
+    backend = settings.CACHES[settings.API_CACHE_ALIAS]['BACKEND']
+    if workers > 1 and backend.endswith('.LocMemCache'):
+        raise ImproperlyConfigured(
+            f'{backend} не общий для {workers} воркеров: укажите '
+            'CACHE_BACKEND и CACHE_LOCATION общего кэша (Memcached, Redis) '
+            'или GUNICORN_WORKERS=1')
+
+
+def title_scopes(title_id):
+    """
+    Области, от которых зависит одно произведение: его собственная
+    (запись произведения, его жанров и отзывов) и справочники категорий
+    и жанров, названия из которых в него вложены
+    """
+    return (f'title:{title_id}', 'categories', 'genres')
+
+
+def get_role(request):
+    user = request.user
+    if not user.is_authenticated:
+        return 'anonymous'
+    if user.is_superuser:
+        return 'superuser'
+    return user.role
+
+
+def get_fingerprint(request, *values):
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    parts = [request.get_host(), request.path, query, get_role(request)]
+    parts.extend(map(repr, values))
+    return hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+
+class CacheScopesMixin:
+    """
+    cache_scopes — области данных, от которых зависит ответ
+    """
+    cache_scopes = ()
+
+    def get_cache_scopes(self):
+        return self.cache_scopes
+
+
+class CachedResponseMixin(CacheScopesMixin):
+    """
+    Кэширует ответы list и retrieve. Ключ строится по пути, параметрам
+    запроса, роли пользователя и отметкам изменения cache_scopes
+    """
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if not settings.API_CACHE_TIMEOUT:
+            return handler(request, *args, **kwargs)
+        cache = get_cache()
+        key = RESPONSE_KEY.format(get_fingerprint(
+            request, *get_markers(self.get_cache_scopes())))
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, settings.API_CACHE_TIMEOUT)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs)
+
+
+class ConditionalGetMixin(CacheScopesMixin):
+    """
+    ETag и Last-Modified для list и retrieve. Заголовки считаются по
+    отметкам изменения cache_scopes, а для списков с conditional_field —
+    ещё и по числу строк и последней дате, без сериализации ответа
+    """
+    conditional_field = None
+
+    def get_conditional_state(self, request):
+        markers = get_markers(self.get_cache_scopes())
+        values = list(markers)
+        last_modified = max(markers, default=None)
+        if self.conditional_field and self.action == 'list':
+            state = self.filter_queryset(
+                self.get_queryset()
+            ).order_by().aggregate(
+                count=Count('pk'), last=Max(self.conditional_field))
+            values.extend((state['count'], state['last']))
+            if state['last'] is not None:
+                last_modified = max(
+                    last_modified or 0, state['last'].timestamp())
+        etag = f'"{get_fingerprint(request, *values)}"'
+        if last_modified is not None:
+            last_modified = int(last_modified)
+        return etag, last_modified
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_conditional_state(request)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        else:
+            response = Response(status=response.status_code)
+        if response.status_code in (status.HTTP_200_OK,
+                                    status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs)
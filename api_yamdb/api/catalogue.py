@@ -0,0 +1,71 @@
+"""
+Все категории и жанры в памяти процесса. Справочник загружается целиком
+при первом обращении и перечитывается, когда в общем кэше меняется
+отметка изменения областей categories и genres (см. api.cache.touch),
+а также не реже чем раз в API_CATALOGUE_TTL секунд
+"""
+import threading
+import time
+
+from django.conf import settings
+from reviews.models import Category, Genre
+
+from .cache import get_markers
+
+SCOPES = ('categories', 'genres')
+MODELS = (Category, Genre)
+
+_catalogue = None
+_lock = threading.Lock()
+
+
+class Catalogue:
+
+    def __init__(self, markers):
+        self.markers = markers
+        self.loaded_at = time.monotonic()
+        self.by_pk = {
+            model: {obj.pk: obj for obj in model.objects.all()}
+            for model in MODELS
+        }
+        self.by_slug = {
+            model: {obj.slug: obj for obj in objects.values()}
+            for model, objects in self.by_pk.items()
+        }
+        self._rendered = {}
+
+    def is_stale(self, markers):
+        return (markers != self.markers
+                or time.monotonic() - self.loaded_at
+                > settings.API_CATALOGUE_TTL)
+
+    def render(self, serializer_class, pk):
+        """
+        Объект в представлении serializer_class; KeyError, если его нет
+        """
+        key = (serializer_class, pk)
+        if key not in self._rendered:
+            obj = self.by_pk[serializer_class.Meta.model][pk]
+            self._rendered[key] = dict(serializer_class(obj).data)
+        return dict(self._rendered[key])
+
+
+def get_catalogue(refresh=False):
+    """
+    Актуальный справочник; refresh — перечитать из БД в любом случае
+    """
+    global _catalogue
+    markers = get_markers(SCOPES)
+    catalogue = _catalogue
+    if refresh or catalogue is None or catalogue.is_stale(markers):
+        with _lock:
+            if _catalogue is catalogue:
+                _catalogue = Catalogue(markers)
+            catalogue = _catalogue
+    return catalogue
+
+
+def clear():
+    global _catalogue
+    with _lock:
+        _catalogue = None
@@ -3,14 +3,21 @@ from reviews.models import Title
 
 
 class TitlesFilter(filters.FilterSet):
+    # LIKE '%...%' по name обслуживает триграммный GIN-индекс
+    # title_name_trgm_idx из Title.Meta.indexes
     name = filters.CharFilter(field_name='name', lookup_expr='contains')
-    category = filters.CharFilter(
-        field_name='category__slug', lookup_expr='contains'
-    )
-    genre = filters.CharFilter(
-        field_name='genre__slug', lookup_expr='contains'
-    )
+    category = filters.CharFilter(field_name='category__slug')
+    genre = filters.CharFilter(method='filter_genre')
 
     class Meta:
         model = Title
         fields = ['name', 'genre', 'category', 'year']
+
+    def filter_genre(self, queryset, name, value):
+        # Полусоединение по промежуточной таблице не размножает строки,
+        # поэтому DISTINCT не нужен
+        return queryset.filter(
+            pk__in=Title.genre.through.objects.filter(
+                genre__slug=value
+            ).values('title_id')
+        )
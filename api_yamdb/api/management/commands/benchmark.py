@@ -0,0 +1,95 @@
+from api.benchmark import (SCENARIOS, BenchmarkError, compare,
+                           format_rendering, format_results, load_baseline,
+                           measure_rendering, run, save_baseline)
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (override_settings, setup_test_environment,
+                               teardown_test_environment)
+from reviews.synthetic import generate
+
+
+class Command(BaseCommand):
+    help = ('Заполняет временную базу синтетическими данными и замеряет '
+            'основные эндпоинты v1')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--titles', type=int, default=200)
+        parser.add_argument('--categories', type=int, default=5)
+        parser.add_argument('--genres', type=int, default=10)
+        parser.add_argument('--reviews-per-title', type=int, default=10)
+        parser.add_argument('--comments-per-review', type=int, default=2)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Замеряемых запросов на сценарий')
+        parser.add_argument(
+            '--warmup', type=int, default=5,
+            help='Запросов на прогрев перед замером')
+        parser.add_argument(
+            '--scenario', action='append',
+            choices=[name for name, _, _ in SCENARIOS],
+            help='Замерить только указанные сценарии')
+        parser.add_argument(
+            '--rendering', action='store_true',
+            help='Сравнить рендер страниц произведений и отзывов в JSON '
+                 'стандартным и быстрым рендерером')
+        parser.add_argument(
+            '--cache', action='store_true',
+            help='Не выключать кэш ответов на время прогона')
+        parser.add_argument(
+            '--baseline', help='JSON базового прогона для сравнения')
+        parser.add_argument(
+            '--threshold', type=float, default=0.25,
+            help='Допустимый рост медианы задержки относительно базы, доля')
+        parser.add_argument(
+            '--save-baseline', help='Сохранить результаты в JSON')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            baseline = load_baseline(options['baseline'])
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            overrides = {'API_METRICS_SAMPLE_RATE': 0}
+            if not options['cache']:
+                overrides['API_CACHE_TIMEOUT'] = 0
+            with override_settings(**overrides):
+                created = generate(
+                    users=options['users'],
+                    titles=options['titles'],
+                    categories=options['categories'],
+                    genres=options['genres'],
+                    reviews_per_title=options['reviews_per_title'],
+                    comments_per_review=options['comments_per_review'],
+                    seed=options['seed'],
+                )
+                self.stdout.write(', '.join(
+                    f'{name}: {count}' for name, count in created.items()))
+                results = run(
+                    requests=options['requests'],
+                    warmup=options['warmup'],
+                    scenarios=options['scenario'],
+                )
+                rendering = None
+                if options['rendering']:
+                    rendering = measure_rendering(rounds=options['requests'])
+        except BenchmarkError as error:
+            raise CommandError(error)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        self.stdout.write(format_results(results, baseline))
+        if rendering is not None:
+            self.stdout.write(format_rendering(rendering))
+        if options['save_baseline']:
+            save_baseline(options['save_baseline'], results)
+        if baseline is not None:
+            regressions = compare(results, baseline, options['threshold'])
+            if regressions:
+                raise CommandError(
+                    'Регрессия производительности:\n'
+                    + '\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS('Регрессий нет'))
@@ -0,0 +1,279 @@
+"""
+Метрики ответов в памяти процесса по шаблонам маршрутов
+(/api/v1/titles/<title_id>/reviews/ и т. п.).
+Время ответа и число ответов считаются для всех запросов, время и число
+запросов к БД, повторы SQL и время сериализации — для доли
+API_METRICS_SAMPLE_RATE запросов.
+Если задан API_METRICS_DIR, каждый процесс раз в API_METRICS_FLUSH_INTERVAL
+секунд записывает туда свои метрики в файл <pid>.json, а /metrics отдаёт
+их сумму по всем файлам, в том числе завершившихся воркеров
+"""
+import json
+import os
+import random
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+from functools import lru_cache
+from glob import glob
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+PREFIX = 'yamdb_'
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+METRICS = {
+    'request_duration_seconds': ('Время ответа', DURATION_BUCKETS),
+    'db_duration_seconds': ('Время запросов к БД', DURATION_BUCKETS),
+    'db_queries': ('Запросов к БД за ответ', COUNT_BUCKETS),
+    'db_duplicate_queries': (
+        'Повторных выполнений одного SQL за ответ', COUNT_BUCKETS),
+    'serializer_duration_seconds': (
+        'Время сериализации ответа', DURATION_BUCKETS),
+}
+
+URL_KWARG = re.compile(r'\(\?P<(\w+)>[^)]*\)|<(?:\w+:)?(\w+)>')
+
+_lock = threading.Lock()
+_histograms = {}
+_responses = Counter()
+_recorder = ContextVar('metrics_recorder', default=None)
+_flushed_at = 0
+
+
+class Histogram:
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+def observe(route, name, value):
+    with _lock:
+        histogram = _histograms.get((name, route))
+        if histogram is None:
+            histogram = _histograms[name, route] = Histogram(
+                METRICS[name][1])
+        histogram.observe(value)
+
+
+@lru_cache(maxsize=None)
+def route_label(route):
+    """
+    Шаблон маршрута без регулярных выражений: у роутера отзывы
+    и комментарии делят basename, поэтому view_name их не различает
+    """
+    route = URL_KWARG.sub(
+        lambda match: f'<{match.group(1) or match.group(2)}>', route)
+    return '/' + route.replace('^', '').replace('$', '')
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _responses.clear()
+
+
+def snapshot():
+    with _lock:
+        return {
+            'responses': [
+                [*key, value] for key, value in _responses.items()],
+            'histograms': [
+                [*key, histogram.counts, histogram.sum]
+                for key, histogram in _histograms.items()],
+        }
+
+
+def flush(force=False):
+    """
+    Записывает метрики процесса в API_METRICS_DIR, если с прошлой записи
+    прошло API_METRICS_FLUSH_INTERVAL секунд
+    """
+    global _flushed_at
+    if not settings.API_METRICS_DIR:
+        return
+    now = time.monotonic()
+    if not force and now - _flushed_at < settings.API_METRICS_FLUSH_INTERVAL:
+        return
+    _flushed_at = now
+    path = os.path.join(settings.API_METRICS_DIR, f'{os.getpid()}.json')
+    with open(f'{path}.tmp', 'w') as target:
+        json.dump(snapshot(), target)
+    os.replace(f'{path}.tmp', path)
+
+
+def read_snapshots():
+    if not settings.API_METRICS_DIR:
+        return [snapshot()]
+    flush(force=True)
+    snapshots = []
+    for path in glob(os.path.join(settings.API_METRICS_DIR, '*.json')):
+        try:
+            with open(path) as source:
+                snapshots.append(json.load(source))
+        except FileNotFoundError:
+            continue
+    return snapshots
+
+
+def collect():
+    """
+    Ответы и гистограммы, сложенные по всем процессам
+    """
+    responses = Counter()
+    histograms = {}
+    for data in read_snapshots():
+        for route, method, status, value in data['responses']:
+            responses[route, method, status] += value
+        for name, route, counts, total in data['histograms']:
+            if (name, route) not in histograms:
+                histograms[name, route] = [[0] * len(counts), 0]
+            merged = histograms[name, route]
+            merged[0] = [a + b for a, b in zip(merged[0], counts)]
+            merged[1] += total
+    return (sorted(responses.items()),
+            sorted((key, counts, total)
+                   for key, (counts, total) in histograms.items()))
+
+
+class QueryRecorder:
+    """
+    Считает время и тексты SQL через connection.execute_wrapper
+    и время сериализации
+    """
+
+    def __init__(self):
+        self.db_time = 0
+        self.serializer_time = 0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.statements[sql] += 1
+
+    @property
+    def queries(self):
+        return sum(self.statements.values())
+
+    @property
+    def duplicates(self):
+        return self.queries - len(self.statements)
+
+    def timed(self, function):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.serializer_time += time.perf_counter() - start
+        return wrapper
+
+
+class MetricsMiddleware:
+
+    def __init__(self, get_response):
+        if not settings.API_METRICS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        if random.random() >= settings.API_METRICS_SAMPLE_RATE:
+            response = self.get_response(request)
+            self.record(request, response, start)
+            return response
+        recorder = QueryRecorder()
+        token = _recorder.set(recorder)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(recorder))
+                response = self.get_response(request)
+        finally:
+            _recorder.reset(token)
+        route = self.record(request, response, start)
+        observe(route, 'db_duration_seconds', recorder.db_time)
+        observe(route, 'db_queries', recorder.queries)
+        observe(route, 'db_duplicate_queries', recorder.duplicates)
+        observe(route, 'serializer_duration_seconds',
+                recorder.serializer_time)
+        return response
+
+    def record(self, request, response, start):
+        match = request.resolver_match
+        route = route_label(match.route) if match else 'unresolved'
+        observe(route, 'request_duration_seconds',
+                time.perf_counter() - start)
+        with _lock:
+            _responses[route, request.method, response.status_code] += 1
+        flush()
+        return route
+
+
+def timed(function):
+    """
+    function, время которой учитывается как время сериализации,
+    если запрос попал в выборку
+    """
+    recorder = _recorder.get()
+    if recorder is None:
+        return function
+    return recorder.timed(function)
+
+
+class SerializerTimingMixin:
+    """
+    Учитывает время сериализации ответа, если запрос попал в выборку
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        serializer.to_representation = timed(serializer.to_representation)
+        return serializer
+
+
+def render_metrics():
+    """
+    Метрики в текстовом формате Prometheus
+    """
+    responses, histograms = collect()
+    lines = [
+        f'# HELP {PREFIX}responses_total Ответов по маршрутам',
+        f'# TYPE {PREFIX}responses_total counter',
+    ]
+    for (route, method, status), value in responses:
+        lines.append(
+            f'{PREFIX}responses_total{{route="{route}",method="{method}",'
+            f'status="{status}"}} {value}')
+    for name, (help_text, buckets) in METRICS.items():
+        lines.append(f'# HELP {PREFIX}{name} {help_text}')
+        lines.append(f'# TYPE {PREFIX}{name} histogram')
+        for (metric, route), counts, total in histograms:
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(
+                    f'{PREFIX}{name}_bucket{{route="{route}",le="{bound}"}} '
+                    f'{cumulative}')
+            lines.append(f'{PREFIX}{name}_sum{{route="{route}"}} {total}')
+            lines.append(
+                f'{PREFIX}{name}_count{{route="{route}"}} {cumulative}')
+    return '\n'.join(lines) + '\n'
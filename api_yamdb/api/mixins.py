@@ -1,12 +1,229 @@
+from django.conf import settings
+from django.db import transaction
 from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import SearchFilter
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
+from reviews.signals import catalogue_changed
 
+from .cache import CachedResponseMixin, ConditionalGetMixin
+from .metrics import SerializerTimingMixin, timed
+from .pagination import CountlessPageNumberPagination
 from .permissions import IsAdminOrReadOnly
+from .readers import get_reader
+from .serializers import BulkListSerializer, batch_duplicates
 
 
-class ApiViewSet(mixins.CreateModelMixin,
+class QueryPlanMixin:
+    """
+    Подгружает связи, которые нужны сериализатору, одним запросом
+    на уровень вместо запроса на каждый объект.
+    expand_plan описывает связи для путей из параметра ?expand=
+    """
+    select_related = ()
+    prefetch_related = ()
+    expand_plan = {}
+
+    def get_expand(self):
+        if not hasattr(self, '_expand'):
+            request = getattr(self, 'request', None)
+            value = request.query_params.get('expand', '') if request else ''
+            paths = {path.strip() for path in value.split(',') if path.strip()}
+            unknown = paths - set(self.expand_plan)
+            if unknown:
+                raise ValidationError(
+                    {'expand': f'Недопустимые связи: {", ".join(unknown)}'})
+            for path in list(paths):
+                parts = path.split('.')
+                paths.update(
+                    '.'.join(parts[:i]) for i in range(1, len(parts)))
+            self._expand = paths
+        return self._expand
+
+    def plan_queryset(self, queryset):
+        select_related = list(self.select_related)
+        prefetch_related = list(self.prefetch_related)
+        for path in self.get_expand():
+            select, prefetch = self.expand_plan[path]
+            select_related.extend(select)
+            prefetch_related.extend(prefetch)
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset
+
+    def get_queryset(self):
+        return self.plan_queryset(super().get_queryset())
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['expand'] = self.get_expand()
+        return context
+
+
+class ValuesListMixin:
+    """
+    list без полей DRF: страница читается через values() и сразу
+    превращается в словари того же вида, что у сериализатора
+    (api.readers). С ?expand=, при API_VALUES_LIST=False или если
+    сериализатор так не прочитать, работает обычный list
+    """
+
+    def get_values_reader(self):
+        if not settings.API_VALUES_LIST or self.get_expand():
+            return None
+        return get_reader(self.get_serializer_class())
+
+    def get_values_columns(self):
+        """
+        Поля, по которым курсорная пагинация строит курсор
+        """
+        ordering = getattr(self.paginator, 'ordering', ())
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        return [field.lstrip('-') for field in ordering]
+
+    def list(self, request, *args, **kwargs):
+        reader = self.get_values_reader()
+        if reader is None:
+            return super().list(request, *args, **kwargs)
+        queryset = reader.values(
+            self.filter_queryset(self.get_queryset()),
+            self.get_values_columns())
+        render = timed(reader.render)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                render(page, self.get_serializer_context()))
+        return Response(render(queryset, self.get_serializer_context()))
+
+
+class PaginationModeMixin:
+    """
+    Выбор пагинации на запрос: ?pagination=page|cursor и ?count=false.
+    Значения по умолчанию задаются в настройках API_PAGINATION
+    и API_PAGINATION_COUNT
+    """
+    pagination_class = PageNumberPagination
+    countless_pagination_class = CountlessPageNumberPagination
+    cursor_pagination_class = None
+
+    def get_pagination_class(self):
+        params = self.request.query_params
+        mode = params.get('pagination', settings.API_PAGINATION)
+        if self.cursor_pagination_class is not None and (
+                mode == 'cursor' or 'cursor' in params):
+            return self.cursor_pagination_class
+        count = params.get('count', str(settings.API_PAGINATION_COUNT))
+        if count.lower() in ('0', 'false', 'no'):
+            return self.countless_pagination_class
+        return self.pagination_class
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            self._paginator = self.get_pagination_class()()
+        return self._paginator
+
+
+class BulkWriteMixin:
+    """
+    Пакетные операции на <prefix>/bulk/: POST создаёт, PATCH изменяет,
+    DELETE удаляет массив объектов в одной транзакции. При ошибке
+    ничего не записывается, а в ответе — ошибки по каждому элементу.
+    Категории и жанры по slug берутся из справочника api.catalogue
+    """
+    bulk_lookup_field = 'id'
+
+    def get_bulk_items(self, request):
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise ValidationError('Ожидается непустой массив объектов')
+        if len(items) > settings.API_BULK_MAX_ITEMS:
+            raise ValidationError(
+                f'Не больше {settings.API_BULK_MAX_ITEMS} объектов за раз')
+        if not all(isinstance(item, dict) for item in items):
+            raise ValidationError('Элементы массива должны быть объектами')
+        return items
+
+    def get_bulk_instances(self, items):
+        keys = [item.get(self.bulk_lookup_field) for item in items]
+        instances = {
+            str(getattr(obj, self.bulk_lookup_field)): obj
+            for obj in self.get_queryset().filter(
+                **{f'{self.bulk_lookup_field}__in': [
+                    key for key in keys if key is not None]})
+        }
+        errors = [
+            {} if str(key) in instances else
+            {self.bulk_lookup_field: ['Объект не найден']}
+            for key in keys
+        ]
+        if any(errors):
+            raise ValidationError(errors)
+        return [instances[str(key)] for key in keys]
+
+    @action(detail=False, methods=['post', 'patch', 'delete'])
+    def bulk(self, request, *args, **kwargs):
+        if request.method == 'DELETE':
+            return self.bulk_destroy(request)
+        if request.method == 'PATCH':
+            return self.bulk_update(request)
+        return self.bulk_create(request)
+
+    def bulk_create(self, request):
+        items = self.get_bulk_items(request)
+        serializer = BulkListSerializer(
+            child=self.get_serializer_class()(),
+            data=items,
+            context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        catalogue_changed.send(sender=self.__class__)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def bulk_update(self, request):
+        items = self.get_bulk_items(request)
+        context = self.get_serializer_context()
+        serializers = [
+            self.get_serializer_class()(
+                instance, data=item, partial=True, context=context)
+            for instance, item in zip(self.get_bulk_instances(items), items)
+        ]
+        errors = [
+            {} if serializer.is_valid() else serializer.errors
+            for serializer in serializers
+        ]
+        if not any(errors):
+            errors = batch_duplicates(
+                self.get_queryset().model,
+                [serializer.validated_data for serializer in serializers],
+                [serializer.instance for serializer in serializers])
+        if any(errors):
+            raise ValidationError(errors)
+        with transaction.atomic():
+            for serializer in serializers:
+                serializer.save()
+        catalogue_changed.send(sender=self.__class__)
+        return Response([serializer.data for serializer in serializers])
+
+    def bulk_destroy(self, request):
+        instances = self.get_bulk_instances(self.get_bulk_items(request))
+        with transaction.atomic():
+            self.get_queryset().filter(
+                pk__in=[instance.pk for instance in instances]).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ApiViewSet(BulkWriteMixin,
+                 ConditionalGetMixin,
+                 CachedResponseMixin,
+                 QueryPlanMixin,
+                 SerializerTimingMixin,
+                 mixins.CreateModelMixin,
                  mixins.UpdateModelMixin,
                  mixins.DestroyModelMixin,
                  mixins.ListModelMixin,
@@ -0,0 +1,177 @@
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (Cursor, CursorPagination,
+                                       PageNumberPagination)
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class CountlessPageNumberPagination(PageNumberPagination):
+    """
+    Постраничная выдача без COUNT(*): о следующей странице
+    узнаём по лишней записи в выборке
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        try:
+            page_number = int(
+                request.query_params.get(self.page_query_param, 1))
+        except ValueError:
+            page_number = 0
+        if page_number < 1:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=page_number, message='Неверный номер страницы'))
+        offset = (page_number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        if not rows and page_number > 1:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=page_number, message='Страница пуста'))
+        self.request = request
+        self.page_number = page_number
+        self.has_next = len(rows) > page_size
+        return rows[:page_size]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.page_query_param, self.page_number + 1)
+
+    def get_previous_link(self):
+        if self.page_number == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(
+            url, self.page_query_param, self.page_number - 1)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        schema['properties'].pop('count')
+        return schema
+
+
+class IdCursorPagination(CursorPagination):
+    ordering = 'id'
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Курсор по всем полям ordering, а не только по первому: позиция —
+    значения полей крайней записи страницы, соседняя страница отбирается
+    условием (a, b) > (x, y) без OFFSET, даже если у многих записей
+    одинаковое первое поле. Последнее поле ordering должно быть уникальным
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        position = self.cursor.position if self.cursor else None
+        queryset = queryset.order_by(*(
+            field[1:] if field.startswith('-') else f'-{field}'
+            for field in self.ordering) if reverse else self.ordering)
+        try:
+            if position is not None:
+                queryset = queryset.filter(
+                    self.get_keyset_filter(position, reverse))
+            results = list(queryset[:self.page_size + 1])
+        except (ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_keyset_filter(self, position, reverse):
+        """
+        Записи после позиции в порядке выборки. Условие на первое поле
+        повторено отдельно, чтобы БД начала чтение индекса с позиции
+        """
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') != reverse else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        first = self.ordering[0]
+        lookup = 'lte' if first.startswith('-') != reverse else 'gte'
+        return Q(**{f'{first.lstrip("-")}__{lookup}': position[0]}) & condition
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        # Пустая страница перед первой записью: дальше — первая страница
+        position = (self._get_position_from_instance(
+            self.page[-1], self.ordering) if self.page else None)
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        # Пустая страница после последней записи: назад — последняя
+        position = (self._get_position_from_instance(
+            self.page[0], self.ordering) if self.page else None)
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=True, position=position))
+
+    def decode_cursor(self, request):
+        cursor = super().decode_cursor(request)
+        if cursor is None or cursor.position is None:
+            return cursor
+        try:
+            position = json.loads(cursor.position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if (not isinstance(position, list)
+                or len(position) != len(self.ordering)
+                or not all(isinstance(value, str) for value in position)):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor._replace(position=position)
+
+    def encode_cursor(self, cursor):
+        if cursor.position is not None:
+            cursor = cursor._replace(position=json.dumps(cursor.position))
+        return super().encode_cursor(cursor)
+
+    def _get_position_from_instance(self, instance, ordering):
+        return [
+            str(instance[field.lstrip('-')] if isinstance(instance, dict)
+                else getattr(instance, field.lstrip('-')))
+            for field in ordering]
+
+
+class PubDateCursorPagination(KeysetCursorPagination):
+    ordering = ('pub_date', 'id')
+
+
+class PositionCursorPagination(CursorPagination):
+    ordering = 'position'
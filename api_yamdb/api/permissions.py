@@ -11,7 +11,7 @@ class IsAuthorOrAdminOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         return (request.method in permissions.SAFE_METHODS
                 or request.user.role in (User.ADMIN, User.MODERATOR)
-                or obj.author == request.user
+                or obj.author_id == request.user.pk
                 or request.user.is_superuser
                 )
 
@@ -41,4 +41,4 @@ class IsAdmin(permissions.BasePermission):
             return False
         return (request.user.is_superuser
                 or request.user.role == User.ADMIN
-                or request.user == obj)
+                or obj.pk == request.user.pk)
@@ -0,0 +1,133 @@
+"""
+Чтение списков без полей DRF: выборка values() сразу превращается
+в словари того же вида, что отдаёт сериализатор
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+from .serializers import AuthorUsernameField, CatalogueField, render_catalogue
+from .usernames import get_usernames
+
+UNSUPPORTED_FIELDS = (
+    serializers.BaseSerializer,
+    serializers.ManyRelatedField,
+    serializers.RelatedField,
+    serializers.SerializerMethodField,
+)
+
+_readers = {}
+
+
+class NotReadableError(Exception):
+    pass
+
+
+class ValuesReader:
+    """
+    Читает поля модели, PrimaryKeyRelatedField, AuthorUsernameField
+    и CatalogueField. Если у сериализатора есть другие поля или свой
+    to_representation, reader не строится
+    """
+
+    def __init__(self, serializer_class):
+        if (serializer_class.to_representation
+                is not serializers.ModelSerializer.to_representation):
+            raise NotReadableError(serializer_class)
+        serializer = serializer_class(context={'expand': ()})
+        self.model = serializer.Meta.model
+        self.steps = [
+            self.compile(field) for field in serializer._readable_fields]
+        self.columns = list(dict.fromkeys(
+            column for _, _, column, _ in self.steps))
+
+    def compile(self, field):
+        """
+        (имя поля, вид, колонка values(), параметр)
+        """
+        if isinstance(field, AuthorUsernameField):
+            return field.field_name, 'author', field.source, None
+        if isinstance(field, CatalogueField):
+            if field.many:
+                return field.field_name, 'catalogue_many', 'pk', (
+                    field.serializer_class,
+                    self.model._meta.get_field(field.source))
+            return (field.field_name, 'catalogue', field.source,
+                    field.serializer_class)
+        if (isinstance(field, serializers.PrimaryKeyRelatedField)
+                and field.pk_field is None):
+            return field.field_name, 'pk', field.source, None
+        if isinstance(field, UNSUPPORTED_FIELDS) or '.' in field.source:
+            raise NotReadableError(field)
+        try:
+            model_field = self.model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            raise NotReadableError(field)
+        if model_field.is_relation:
+            raise NotReadableError(field)
+        return field.field_name, 'value', field.source, field.to_representation
+
+    def values(self, queryset, extra=()):
+        """
+        extra — колонки, которые нужны не сериализатору, а пагинации
+        """
+        columns = self.columns + [
+            column for column in extra if column not in self.columns]
+        return queryset.select_related(None).prefetch_related(
+            None).values(*columns)
+
+    def load_links(self, field, pks):
+        """
+        {pk объекта: [pk связанных]} одним запросом, в том же порядке,
+        что и prefetch_related(field.name)
+        """
+        query_name = field.related_query_name()
+        links = {}
+        for owner, pk in field.related_model._default_manager.filter(
+                **{f'{query_name}__in': pks}).values_list(query_name, 'pk'):
+            links.setdefault(owner, []).append(pk)
+        return links
+
+    def render(self, rows, context):
+        rows = list(rows)
+        authors = [
+            column for _, kind, column, _ in self.steps if kind == 'author']
+        usernames = get_usernames(
+            {row[column] for row in rows for column in authors})
+        links = {
+            name: self.load_links(param[1], [row['pk'] for row in rows])
+            for name, kind, _, param in self.steps
+            if kind == 'catalogue_many'
+        }
+        data = []
+        for row in rows:
+            item = {}
+            for name, kind, column, param in self.steps:
+                value = row[column]
+                if kind == 'catalogue_many':
+                    item[name] = [
+                        render_catalogue(context, param[0], pk)
+                        for pk in links[name].get(value, ())]
+                elif value is None:
+                    item[name] = None
+                elif kind == 'value':
+                    item[name] = param(value)
+                elif kind == 'author':
+                    item[name] = usernames.get(value)
+                elif kind == 'catalogue':
+                    item[name] = render_catalogue(context, param, value)
+                else:
+                    item[name] = value
+            data.append(item)
+        return data
+
+
+def get_reader(serializer_class):
+    """
+    ValuesReader сериализатора или None, если его так не прочитать
+    """
+    if serializer_class not in _readers:
+        try:
+            _readers[serializer_class] = ValuesReader(serializer_class)
+        except NotReadableError:
+            _readers[serializer_class] = None
+    return _readers[serializer_class]
@@ -0,0 +1,56 @@
+import re
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+# float меньше 1e-4 и от 1e16 json пишет с показателем из двух цифр
+# (1e-07, 1e+16), а orjson — 1e-7, 1e16 или 0.00001. Остальные float
+# они пишут одинаково
+FLOAT_EXPONENT = re.compile(
+    rb'[\[{:,"]-?(?:0\.0000|\d+(?:\.\d+)?e[-+]?\d+["\]},:])')
+# Регулярное выражение медленное, поэтому сначала ищутся подстроки
+DIGITS = bytes.maketrans(b'123456789', b'000000000')
+
+
+def has_float_exponent(ret):
+    return ((b'0e' in ret.translate(DIGITS) or b'0.0000' in ret)
+            and FLOAT_EXPONENT.search(ret) is not None)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer на orjson с тем же выводом байт в байт: компактный UTF-8
+    с экранированными U+2028 и U+2029, а datetime, Decimal и прочие типы
+    вне JSON приводятся encoder_class DRF. С отступами (браузерный API,
+    ?indent=), при UNICODE_JSON=False, COMPACT_JSON=False или
+    STRICT_JSON=False, без orjson, на данных, которые orjson не записывает,
+    и на float, которые json пишет с показателем (1e-07), работает
+    JSONRenderer.
+
+    Одно отличие: NaN и бесконечность orjson пишет как null, а JSONRenderer
+    при STRICT_JSON=True бросает ValueError
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or self.ensure_ascii
+                or not self.compact or not self.strict
+                or self.get_indent(
+                    accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder_class().default,
+                option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if has_float_exponent(ret):
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+            b'\xe2\x80\xa9', b'\\u2029')
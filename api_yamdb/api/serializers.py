@@ -1,6 +1,222 @@
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Manager
+from django.utils.encoding import smart_str
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 from rest_framework.validators import UniqueTogetherValidator, UniqueValidator
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.models import (Category, Comment, Genre, Review, Title,
+                            TitleRanking, User)
+
+from .catalogue import get_catalogue
+from .usernames import get_usernames
+
+
+class ExpandableFieldsMixin:
+    """
+    Поля из expandable_fields по умолчанию отдаются как id,
+    а вложенным объектом — если путь указан в ?expand=
+    """
+    expandable_fields = {}
+
+    def __init__(self, *args, expand=None, **kwargs):
+        self._expand = expand
+        super().__init__(*args, **kwargs)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        expand = self._expand
+        if expand is None:
+            expand = self.context.get('expand', ())
+        for name, serializer_class in self.expandable_fields.items():
+            if name not in expand:
+                continue
+            kwargs = {'read_only': True}
+            if issubclass(serializer_class, ExpandableFieldsMixin):
+                kwargs['expand'] = {
+                    path[len(name) + 1:] for path in expand
+                    if path.startswith(f'{name}.')
+                }
+            fields[name] = serializer_class(**kwargs)
+        return fields
+
+
+def get_context_catalogue(context, refresh=False):
+    """
+    Справочник категорий и жанров, один на сериализацию.
+    refresh перечитывает его из БД не больше одного раза
+    """
+    if refresh and not context.get('catalogue_refreshed'):
+        context['catalogue'] = get_catalogue(refresh=True)
+        context['catalogue_refreshed'] = True
+    elif 'catalogue' not in context:
+        context['catalogue'] = get_catalogue()
+    return context['catalogue']
+
+
+def render_catalogue(context, serializer_class, pk):
+    """
+    Категория или жанр в представлении serializer_class
+    """
+    try:
+        return get_context_catalogue(context).render(serializer_class, pk)
+    except KeyError:
+        return get_context_catalogue(context, refresh=True).render(
+            serializer_class, pk)
+
+
+class CatalogueSlugRelatedField(serializers.SlugRelatedField):
+    """
+    Категория или жанр по slug из справочника в памяти процесса
+    """
+
+    def to_internal_value(self, data):
+        model = self.get_queryset().model
+        slug = smart_str(data)
+        for refresh in (False, True):
+            obj = get_context_catalogue(
+                self.context, refresh).by_slug[model].get(slug)
+            if obj is not None:
+                return obj
+        self.fail('does_not_exist', slug_name=self.slug_field, value=slug)
+
+
+class CatalogueField(serializers.Field):
+    """
+    Категория (по category_id) или жанры произведения (many=True)
+    в представлении serializer_class из справочника в памяти процесса
+    """
+
+    def __init__(self, serializer_class, many=False, **kwargs):
+        self.serializer_class = serializer_class
+        self.many = many
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if self.many:
+            return [
+                render_catalogue(self.context, self.serializer_class, obj.pk)
+                for obj in value.all()
+            ]
+        return render_catalogue(self.context, self.serializer_class, value)
+
+
+class AuthorUsernameField(serializers.ReadOnlyField):
+    """
+    Имя автора по author_id без загрузки пользователя. Имена для всей
+    страницы заранее собирает AuthorListSerializer
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('source', 'author_id')
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        usernames = self.context.setdefault('usernames', {})
+        if value not in usernames:
+            usernames.update(get_usernames([value]))
+        return usernames.get(value)
+
+
+def collect_author_ids(serializer, instance, ids):
+    for field in serializer._readable_fields:
+        if isinstance(field, AuthorUsernameField):
+            ids.add(field.get_attribute(instance))
+        elif isinstance(field, serializers.Serializer):
+            nested = field.get_attribute(instance)
+            if nested is not None:
+                collect_author_ids(field, nested, ids)
+
+
+class AuthorListSerializer(serializers.ListSerializer):
+    """
+    Имена авторов всей страницы, в том числе во вложенных объектах,
+    читаются одним запросом
+    """
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, Manager) else data)
+        ids = set()
+        for item in items:
+            collect_author_ids(self.child, item, ids)
+        self.context.setdefault('usernames', {}).update(get_usernames(ids))
+        return super().to_representation(items)
+
+
+def batch_duplicates(model, items, instances=None):
+    """
+    Ошибки по элементам пакета, в которых значение уникального поля
+    модели повторяет значение из предыдущего элемента. Значения берутся
+    из items, а если поля в элементе нет — из instances
+    """
+    errors = [{} for _ in items]
+    for field in model._meta.concrete_fields:
+        if not field.unique:
+            continue
+        seen = {}
+        for index, item in enumerate(items):
+            if field.name in item:
+                value = item[field.name]
+            elif instances is not None:
+                value = getattr(instances[index], field.attname)
+            else:
+                continue
+            if value is None:
+                continue
+            if value in seen:
+                errors[index][field.name] = [
+                    f'Совпадает с объектом {seen[value]} этого пакета']
+            else:
+                seen[value] = index
+    return errors
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    Создаёт пачку объектов через bulk_create. Связи многие-ко-многим
+    записываются одной вставкой в промежуточную таблицу
+    """
+
+    def to_internal_value(self, data):
+        validated_data = super().to_internal_value(data)
+        errors = batch_duplicates(self.child.Meta.model, validated_data)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return validated_data
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        many_to_many = [
+            field for field in model._meta.many_to_many
+            if field.name in self.child.fields
+        ]
+        related = [
+            {field.name: item.pop(field.name, ()) for field in many_to_many}
+            for item in validated_data
+        ]
+        objs = [model(**item) for item in validated_data]
+        try:
+            with transaction.atomic():
+                if connection.features.can_return_ids_from_bulk_insert:
+                    objs = model.objects.bulk_create(objs)
+                else:
+                    for obj in objs:
+                        obj.save(force_insert=True)
+                for field in many_to_many:
+                    source = f'{field.m2m_field_name()}_id'
+                    target = f'{field.m2m_reverse_field_name()}_id'
+                    field.remote_field.through.objects.bulk_create([
+                        field.remote_field.through(
+                            **{source: obj.pk, target: value.pk})
+                        for obj, values in zip(objs, related)
+                        for value in values[field.name]
+                    ])
+        except IntegrityError:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Объекты пакета нарушают ограничение уникальности'],
+            })
+        return objs
 
 
 class GetTokenSerializer(serializers.Serializer):
@@ -21,61 +237,80 @@ class GenreSerializer(serializers.ModelSerializer):
 
 
 class TitleSlugSerializer(serializers.ModelSerializer):
-    genre = serializers.SlugRelatedField(
+    genre = CatalogueSlugRelatedField(
         many=True,
         slug_field='slug',
         queryset=Genre.objects.all())
-    category = serializers.SlugRelatedField(
+    category = CatalogueSlugRelatedField(
         slug_field='slug',
         queryset=Category.objects.all())
 
     class Meta:
         model = Title
-        fields = '__all__'
+        exclude = ('rating', 'reviews_count', 'score_sum')
 
 
 class TitleGeneralSerializer(serializers.ModelSerializer):
 
-    category = CategorySerializer(required=False)
-    genre = GenreSerializer(many=True)
-    rating = serializers.IntegerField(
-        source='reviews_title__score__avg', read_only=True
-    )
+    category = CatalogueField(CategorySerializer, source='category_id')
+    genre = CatalogueField(GenreSerializer, many=True)
+    rating = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Title
-        fields = '__all__'
+        exclude = ('reviews_count', 'score_sum')
+
+
+class TitleStatsSerializer(serializers.Serializer):
+    count = serializers.IntegerField()
+    mean = serializers.FloatField()
+    median = serializers.FloatField()
+    histogram = serializers.DictField(child=serializers.IntegerField())
+
 
+class TitleRankingSerializer(serializers.ModelSerializer):
+    title = TitleGeneralSerializer(read_only=True)
 
-class ReviewSerializer(serializers.ModelSerializer):
-    title = TitleGeneralSerializer(many=False, read_only=True)
-    author = serializers.SlugRelatedField(
-        read_only=True,
-        slug_field='username')
+    class Meta:
+        model = TitleRanking
+        fields = ('position', 'score', 'title')
+
+
+class ReviewSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
+    title = serializers.PrimaryKeyRelatedField(read_only=True)
+    author = AuthorUsernameField()
+    expandable_fields = {'title': TitleGeneralSerializer}
 
     class Meta:
         model = Review
+        list_serializer_class = AuthorListSerializer
         fields = ['id', 'title', 'author', 'text', 'score', 'pub_date']
 
-    def validate(self, data):
-        if self.context['view'].action == 'create':
-            author = self.context['request'].user
-            title = self.context['view'].kwargs.get('title_id')
-            if Review.objects.filter(
-                    title=title, author=author).exists():
-                raise serializers.ValidationError(
-                    'Отзыв уже есть')
-        return data
+    def create(self, validated_data):
+        """
+        Повторный отзыв отсекает ограничение single_review_per_user,
+        без предварительной проверки
+        """
+        try:
+            return super().create(validated_data)
+        except IntegrityError:
+            if not Review.objects.filter(
+                    title_id=validated_data.get('title_id'),
+                    author_id=validated_data.get('author_id')).exists():
+                raise
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: ['Отзыв уже есть'],
+            })
 
 
-class CommentSerializer(serializers.ModelSerializer):
-    author = serializers.SlugRelatedField(
-        read_only=True,
-        slug_field='username')
-    review = ReviewSerializer(many=False, read_only=True)
+class CommentSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
+    author = AuthorUsernameField()
+    review = serializers.PrimaryKeyRelatedField(read_only=True)
+    expandable_fields = {'review': ReviewSerializer}
 
     class Meta:
         model = Comment
+        list_serializer_class = AuthorListSerializer
         fields = ['id', 'text', 'author', 'pub_date', 'review']
 
 
@@ -0,0 +1,92 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.signals import catalogue_changed, leaderboards_refreshed
+
+from .authentication import revoke_tokens
+from .cache import touch
+from .usernames import forget
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, **kwargs):
+    touch('categories', 'titles')
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def genre_changed(sender, **kwargs):
+    touch('genres', 'titles')
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def title_changed(sender, instance, **kwargs):
+    touch('titles', f'title:{instance.pk}')
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, instance, reverse, pk_set, **kwargs):
+    if not reverse:
+        touch('titles', f'title:{instance.pk}')
+    elif pk_set:
+        touch('titles', *(f'title:{pk}' for pk in pk_set))
+    else:
+        # У жанра убраны все произведения: какие — неизвестно
+        touch('titles', 'genres')
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def review_changed(sender, instance, **kwargs):
+    """
+    Рейтинг есть во всех списках произведений, поэтому они сбрасываются
+    любым отзывом; страница и отзывы — только у произведения отзыва
+    и у прежнего, если отзыв перенесён
+    """
+    title_ids = {instance.title_id}
+    loaded_title_id, _ = getattr(instance, '_loaded_score', None) or (
+        None, None)
+    if loaded_title_id is not None:
+        title_ids.add(loaded_title_id)
+    touch('titles', *(
+        scope for title_id in title_ids
+        for scope in (f'title:{title_id}', f'reviews:{title_id}')))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    touch(f'comments:{instance.review_id}')
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    if created:
+        touch('users')
+        return
+    touch('users', 'authors')
+    forget(instance.pk)
+    # _loaded_claims — значения при загрузке или прошлом сохранении
+    if getattr(instance, '_loaded_claims', None) not in (
+            None, instance.token_claims):
+        revoke_tokens(instance.pk)
+        instance.refresh_from_db(fields=['token_version'])
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    touch('users', 'authors')
+    forget(instance.pk)
+    revoke_tokens(instance.pk)
+
+
+@receiver(catalogue_changed)
+def catalogue_changed_in_bulk(sender, **kwargs):
+    touch('categories', 'genres', 'titles', 'users', 'authors')
+
+
+@receiver(leaderboards_refreshed)
+def leaderboards_changed(sender, **kwargs):
+    touch('leaderboards')
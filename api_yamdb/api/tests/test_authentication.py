@@ -0,0 +1,100 @@
+from api import authentication
+from api.authentication import StatelessJWTAuthentication, issue_token
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from reviews.models import User
+
+
+class StatelessJWTAuthenticationTest(TestCase):
+    """
+    Токены из утверждений отзываются сменой роли, блокировкой и удалением
+    пользователя, и отзыв не зависит от кэша
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            username='user', email='user@yamdb.com')
+
+    def setUp(self):
+        authentication._versions.clear()
+
+    def authenticate(self, token):
+        request = APIRequestFactory().get(
+            '/api/v1/titles/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return StatelessJWTAuthentication().authenticate(request)
+
+    def test_issued_token(self):
+        token = issue_token(self.user)
+        user, _ = self.authenticate(token)
+        self.assertEqual(
+            (user.id, user.username, user.role),
+            (self.user.pk, 'user', User.USER))
+        with self.assertNumQueries(0):
+            self.authenticate(token)
+
+    def test_role_change_revokes_tokens(self):
+        token = issue_token(self.user)
+        self.authenticate(token)
+        user = User.objects.get(pk=self.user.pk)
+        user.role = User.MODERATOR
+        user.save()
+        caches['default'].clear()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+        user, _ = self.authenticate(issue_token(user))
+        self.assertEqual(user.role, User.MODERATOR)
+
+    def test_other_changes_keep_tokens(self):
+        token = issue_token(self.user)
+        user = User.objects.get(pk=self.user.pk)
+        user.bio = 'bio'
+        with CaptureQueriesContext(connection) as context:
+            user.save()
+        self.assertFalse([
+            query for query in context.captured_queries
+            if query['sql'].startswith('SELECT')])
+        self.authenticate(token)
+
+    def test_partially_loaded_user(self):
+        token = issue_token(self.user)
+        user = User.objects.only('pk', 'bio').get(pk=self.user.pk)
+        user.role = User.ADMIN
+        user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+        self.assertEqual(User.objects.get(pk=self.user.pk).bio, '')
+
+    @override_settings(JWT_REVOCATION_CACHE_SIZE=2)
+    def test_versions_cache_is_bounded(self):
+        users = [self.user] + [
+            User.objects.create(
+                username=f'user{number}', email=f'user{number}@yamdb.com')
+            for number in range(3)]
+        for user in users:
+            self.authenticate(issue_token(user))
+        self.assertEqual(
+            list(authentication._versions), [users[2].pk, users[3].pk])
+
+    def test_stale_instance_does_not_restore_tokens(self):
+        stale = User.objects.get(pk=self.user.pk)
+        token = issue_token(stale)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        user = User.objects.get(pk=self.user.pk)
+        user.is_active = True
+        user.save()
+        stale.bio = 'bio'
+        stale.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+
+    def test_deletion_revokes_tokens(self):
+        token = issue_token(self.user)
+        self.authenticate(token)
+        User.objects.filter(pk=self.user.pk).delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
@@ -0,0 +1,42 @@
+from api.benchmark import SCENARIOS, compare, run
+from django.test import TestCase, override_settings
+from reviews.models import Category, Genre, Review, Title, User
+from reviews.synthetic import generate
+
+
+@override_settings(API_CACHE_TIMEOUT=0)
+class BenchmarkTest(TestCase):
+
+    def test_all_scenarios_run_on_synthetic_data(self):
+        created = generate(
+            users=5, titles=4, categories=2, genres=3,
+            reviews_per_title=3, comments_per_review=1)
+        self.assertEqual(created['reviews'], 12)
+        self.assertEqual(Title.objects.filter(reviews_count=3).count(), 4)
+        results = run(requests=2, warmup=0)
+        self.assertEqual(
+            list(results), [name for name, _, _ in SCENARIOS])
+        for result in results.values():
+            self.assertGreater(result['queries'], 0)
+        self.assertEqual(compare(results, results, 0), [])
+
+    def test_generate_is_reproducible(self):
+        generate(users=5, titles=4, reviews_per_title=3, seed=7)
+        first = list(Review.objects.order_by('pk').values_list(
+            'title__name', 'author__username', 'score'))
+        for model in (Title, User, Category, Genre):
+            model.objects.all().delete()
+        generate(users=5, titles=4, reviews_per_title=3, seed=7)
+        second = list(Review.objects.order_by('pk').values_list(
+            'title__name', 'author__username', 'score'))
+        self.assertEqual(first, second)
+
+    def test_compare_flags_more_queries_and_slower_median(self):
+        baseline = {'titles': {'p50': 10.0, 'queries': 3}}
+        self.assertEqual(
+            len(compare({'titles': {'p50': 20.0, 'queries': 4}},
+                        baseline, 0.25)),
+            2)
+        self.assertEqual(
+            compare({'titles': {'p50': 12.0, 'queries': 3}}, baseline, 0.25),
+            [])
@@ -0,0 +1,113 @@
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import Category, Genre, Title, User
+
+
+@override_settings(API_CACHE_TIMEOUT=0)
+class BulkWriteTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(
+            username='admin', email='admin@yamdb.com', role=User.ADMIN)
+        cls.category = Category.objects.create(name='Фильм', slug='film')
+        cls.genre = Genre.objects.create(name='Драма', slug='drama')
+
+    def setUp(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.admin)}')
+
+    def bulk(self, method, prefix, items):
+        return getattr(self.client, method)(
+            f'/api/v1/{prefix}/bulk/', items, format='json')
+
+    def test_create(self):
+        response = self.bulk('post', 'titles', [
+            {'name': f'Title {number}', 'year': 2000, 'description': '-',
+             'category': 'film', 'genre': ['drama']}
+            for number in range(3)])
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(
+            [item['name'] for item in response.json()],
+            ['Title 0', 'Title 1', 'Title 2'])
+        self.assertEqual(
+            Title.objects.filter(genre=self.genre, category=self.category)
+            .count(), 3)
+
+    def test_create_reports_errors_per_item(self):
+        response = self.bulk('post', 'genres', [
+            {'name': 'Комедия', 'slug': 'comedy'},
+            {'name': 'Драма', 'slug': 'drama'},
+            {'name': 'Комедия', 'slug': 'comedy'},
+            {'name': 'Ужасы'},
+        ])
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()
+        self.assertEqual(errors[0], {})
+        self.assertIn('slug', errors[1])
+        self.assertEqual(list(errors[3]), ['slug'])
+        response = self.bulk('post', 'genres', [
+            {'name': 'Комедия', 'slug': 'comedy'},
+            {'name': 'Ужасы', 'slug': 'horror'},
+            {'name': 'Комедия', 'slug': 'comedy'},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), [
+            {}, {}, {'slug': ['Совпадает с объектом 0 этого пакета']}])
+        self.assertEqual(Genre.objects.count(), 1)
+
+    def test_update(self):
+        other = Category.objects.create(name='Книга', slug='book')
+        response = self.bulk('patch', 'categories', [
+            {'slug': 'film', 'name': 'Кино'},
+            {'slug': 'book', 'name': 'Книги'},
+        ])
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(
+            dict(Category.objects.values_list('slug', 'name')),
+            {'film': 'Кино', 'book': 'Книги'})
+        self.assertEqual(other.pk, Category.objects.get(slug='book').pk)
+
+    def test_update_reports_duplicates_per_item(self):
+        titles = [
+            Title.objects.create(name=f'Title {number}', year=2000,
+                                 description='-')
+            for number in range(2)]
+        response = self.bulk('patch', 'titles', [
+            {'id': titles[0].pk, 'name': 'A'},
+            {'id': titles[1].pk, 'name': 'B'},
+            {'id': titles[0].pk, 'name': 'C'},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), [
+            {}, {}, {'id': ['Совпадает с объектом 0 этого пакета']}])
+        Category.objects.create(name='Книга', slug='book')
+        response = self.bulk('patch', 'categories', [
+            {'slug': 'film', 'name': 'Кино'},
+            {'slug': 'missing', 'name': '-'},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), [
+            {}, {'slug': ['Объект не найден']}])
+        self.assertEqual(
+            set(Title.objects.values_list('name', flat=True)),
+            {'Title 0', 'Title 1'})
+
+    def test_delete(self):
+        Genre.objects.create(name='Комедия', slug='comedy')
+        response = self.bulk('delete', 'genres', [
+            {'slug': 'drama'}, {'slug': 'missing'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Genre.objects.count(), 2)
+        response = self.bulk('delete', 'genres', [
+            {'slug': 'drama'}, {'slug': 'comedy'}])
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Genre.objects.exists())
+
+    def test_only_admins_write(self):
+        self.client.credentials()
+        response = self.bulk('post', 'genres', [
+            {'name': 'Комедия', 'slug': 'comedy'}])
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.bulk('post', 'genres', {}).status_code, 401)
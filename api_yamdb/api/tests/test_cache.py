@@ -0,0 +1,154 @@
+import os
+import runpy
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import Genre, Review, Title, User
+
+GUNICORN_CONF = Path(settings.BASE_DIR) / 'api_yamdb' / 'gunicorn.conf.py'
+DUMMY_CACHE = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+MEMCACHED = {'default': {
+    'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+    'LOCATION': 'memcached:11211'}}
+
+
+class ConditionalGetTest(APITestCase):
+    """
+    304 отдаётся, пока данные не менялись, и перестаёт отдаваться
+    после записи
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(
+            username='author', email='author@yamdb.com')
+        cls.title = Title.objects.create(
+            name='Title', year=2000, description='-')
+        cls.review = Review.objects.create(
+            title=cls.title, author=cls.author, text='-', score=5)
+
+    def setUp(self):
+        caches['default'].clear()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.author)}')
+
+    def get(self, path, etag=None):
+        if etag is None:
+            return self.client.get(path)
+        return self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+
+    def assert_not_modified(self, path):
+        response = self.get(path)
+        self.assertEqual(response.status_code, 200)
+        response = self.get(path, response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        return response['ETag']
+
+    def test_not_modified(self):
+        for path in (f'/api/v1/titles/{self.title.pk}/',
+                     f'/api/v1/titles/{self.title.pk}/reviews/',
+                     f'/api/v1/titles/{self.title.pk}/stats/'):
+            with self.subTest(path=path):
+                self.assert_not_modified(path)
+
+    def test_write_changes_etag(self):
+        path = f'/api/v1/titles/{self.title.pk}/reviews/'
+        etag = self.assert_not_modified(path)
+        response = self.client.patch(
+            f'{path}{self.review.pk}/', {'text': 'Новый текст'})
+        self.assertEqual(response.status_code, 200)
+        response = self.get(path, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['results'][0]['text'], 'Новый текст')
+
+    @override_settings(CACHES=DUMMY_CACHE)
+    def test_cache_without_markers_is_not_trusted(self):
+        path = f'/api/v1/titles/{self.title.pk}/'
+        etag = self.get(path)['ETag']
+        self.assertEqual(self.get(path, etag).status_code, 200)
+
+
+class ResponseCacheTest(APITestCase):
+    """
+    Запись в произведение, его жанры или отзывы сбрасывает кэш этого
+    произведения и списков, но не страниц других произведений
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(
+            username='author', email='author@yamdb.com')
+        cls.titles = [
+            Title.objects.create(name=f'Title {number}', year=2000,
+                                 description='-')
+            for number in range(2)]
+        cls.genre = Genre.objects.create(name='Драма', slug='drama')
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def get_title(self, title):
+        return self.client.get(f'/api/v1/titles/{title.pk}/').json()
+
+    def assert_cached(self, title):
+        with self.assertNumQueries(0):
+            self.get_title(title)
+
+    def test_review_resets_only_its_title(self):
+        first, second = self.titles
+        self.assertIsNone(self.get_title(first)['rating'])
+        self.get_title(second)
+        self.client.get('/api/v1/titles/')
+        review = Review.objects.create(
+            title=first, author=self.author, text='-', score=8)
+        self.assertEqual(self.get_title(first)['rating'], 8)
+        self.assertEqual(
+            self.client.get('/api/v1/titles/').json()['results'][0]['rating'],
+            8)
+        self.assert_cached(second)
+        review.title = second
+        review.save()
+        self.assertIsNone(self.get_title(first)['rating'])
+        self.assertEqual(self.get_title(second)['rating'], 8)
+
+    def test_genres_reset_their_titles(self):
+        first, second = self.titles
+        self.get_title(first)
+        self.get_title(second)
+        self.genre.title_set.add(first)
+        self.assertEqual(
+            self.get_title(first)['genre'],
+            [{'name': 'Драма', 'slug': 'drama'}])
+        self.assert_cached(second)
+        second.genre.add(self.genre)
+        self.assertEqual(len(self.get_title(second)['genre']), 1)
+        self.genre.title_set.clear()
+        self.assertEqual(self.get_title(first)['genre'], [])
+        self.assertEqual(self.get_title(second)['genre'], [])
+
+
+class SharedCacheCheckTest(APITestCase):
+
+    def on_starting(self, workers):
+        with tempfile.TemporaryDirectory() as directory, mock.patch.dict(
+                os.environ, {'API_METRICS_DIR': directory}):
+            runpy.run_path(str(GUNICORN_CONF))['on_starting'](
+                SimpleNamespace(cfg=SimpleNamespace(workers=workers)))
+
+    def test_local_cache_with_several_workers(self):
+        with self.assertRaises(ImproperlyConfigured):
+            self.on_starting(3)
+        self.on_starting(1)
+        with override_settings(CACHES=MEMCACHED):
+            self.on_starting(3)
@@ -0,0 +1,54 @@
+from api import catalogue
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import Category, Genre, Title, User
+
+
+class CatalogueTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(
+            username='admin', email='admin@yamdb.com', role=User.ADMIN)
+        cls.category = Category.objects.create(name='Фильм', slug='film')
+        cls.genre = Genre.objects.create(name='Драма', slug='drama')
+        cls.title = Title.objects.create(
+            name='Title', year=2000, description='-', category=cls.category)
+        cls.title.genre.set([cls.genre])
+
+    def setUp(self):
+        catalogue.clear()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.admin)}')
+
+    def get_title(self):
+        return self.client.get(f'/api/v1/titles/{self.title.id}/').json()
+
+    def test_loaded_catalogue_is_not_queried(self):
+        catalogue.get_catalogue()
+        with CaptureQueriesContext(connection) as context:
+            catalogue.get_catalogue()
+        self.assertEqual(len(context), 0)
+
+    def test_renamed_category_is_shown_at_once(self):
+        self.assertEqual(
+            self.get_title()['category'], {'name': 'Фильм', 'slug': 'film'})
+        self.category.name = 'Кино'
+        self.category.save()
+        data = self.get_title()
+        self.assertEqual(data['category'], {'name': 'Кино', 'slug': 'film'})
+        self.assertEqual(data['genre'], [{'name': 'Драма', 'slug': 'drama'}])
+
+    def test_slug_missing_from_loaded_catalogue_is_reloaded(self):
+        catalogue.get_catalogue()
+        Genre.objects.bulk_create([Genre(name='Комедия', slug='comedy')])
+        response = self.client.post('/api/v1/titles/', {
+            'name': 'New', 'year': 2000, 'description': '-',
+            'category': 'film', 'genre': ['drama', 'comedy']})
+        self.assertEqual(response.status_code, 201, response.content)
+        response = self.client.post('/api/v1/titles/', {
+            'name': 'New', 'year': 2000, 'description': '-',
+            'category': 'film', 'genre': ['missing']})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,152 @@
+import csv
+import datetime
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+OLD = datetime.datetime(2022, 1, 1, tzinfo=datetime.timezone.utc)
+NEW = datetime.datetime(2022, 7, 1, tzinfo=datetime.timezone.utc)
+
+
+class ExportDataMixin:
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(
+            username='admin', email='admin@yamdb.com', role=User.ADMIN)
+        cls.author = User.objects.create(
+            username='author', email='author@yamdb.com')
+        category = Category.objects.create(name='Фильм', slug='film')
+        genres = [Genre.objects.create(name=name, slug=slug)
+                  for name, slug in (('Драма', 'drama'), ('Ужасы', 'horror'))]
+        cls.title = Title.objects.create(
+            name='Title', year=2000, description='Описание',
+            category=category)
+        cls.title.genre.set(genres)
+        cls.old, cls.new = [
+            Review.objects.create(
+                title=cls.title, author=author, text=text, score=score)
+            for author, text, score in (
+                (cls.author, 'Старый', 4), (cls.admin, 'Новый', 9))]
+        Review.objects.filter(pk=cls.old.pk).update(pub_date=OLD)
+        Review.objects.filter(pk=cls.new.pk).update(pub_date=NEW)
+        for review, pub_date in ((cls.old, OLD), (cls.new, NEW)):
+            comment = Comment.objects.create(
+                review=review, author=cls.author, text='Комментарий')
+            Comment.objects.filter(pk=comment.pk).update(pub_date=pub_date)
+
+
+class ExportViewTest(ExportDataMixin, APITestCase):
+
+    def export(self, kind, user=None, **params):
+        user = user or self.admin
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        return self.client.get(f'/api/v1/export/{kind}/', params)
+
+    def read(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def read_ndjson(self, response):
+        self.assertEqual(
+            response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        return [json.loads(line)
+                for line in self.read(response).splitlines()]
+
+    def test_only_admins_export(self):
+        self.assertEqual(
+            self.client.get('/api/v1/export/titles/').status_code, 401)
+        for role in (User.USER, User.MODERATOR):
+            user = User.objects.create(
+                username=role, email=f'{role}@yamdb.com', role=role)
+            with self.subTest(role=role):
+                self.assertEqual(
+                    self.export('titles', user).status_code, 403)
+
+    def test_ndjson(self):
+        response = self.export('titles')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response['Content-Disposition'],
+            'attachment; filename="titles.ndjson"')
+        self.assertEqual(self.read_ndjson(response), [{
+            'id': self.title.pk, 'name': 'Title', 'year': 2000,
+            'description': 'Описание', 'category': 'film', 'rating': 6.5,
+            'reviews_count': 2, 'genre': ['drama', 'horror']}])
+        rows = self.read_ndjson(self.export('reviews'))
+        self.assertEqual(rows[0], {
+            'id': self.old.pk, 'title_id': self.title.pk,
+            'author': 'author', 'text': 'Старый', 'score': 4,
+            'pub_date': '2022-01-01T00:00:00Z'})
+        self.assertEqual(len(rows), 2)
+
+    def test_csv(self):
+        response = self.export('titles', output='csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(list(csv.reader(io.StringIO(self.read(response)))), [
+            ['id', 'name', 'year', 'description', 'category', 'rating',
+             'reviews_count', 'genre'],
+            [str(self.title.pk), 'Title', '2000', 'Описание', 'film', '6.5',
+             '2', 'drama,horror']])
+        rows = list(csv.DictReader(io.StringIO(
+            self.read(self.export('comments', output='csv')))))
+        self.assertEqual(
+            [(row['review_id'], row['title_id'], row['author'],
+              row['pub_date']) for row in rows],
+            [(str(self.old.pk), str(self.title.pk), 'author',
+              '2022-01-01T00:00:00Z'),
+             (str(self.new.pk), str(self.title.pk), 'author',
+              '2022-07-01T00:00:00Z')])
+
+    def test_since(self):
+        for kind, field in (('reviews', 'id'), ('comments', 'review_id')):
+            for since in ('2022-03-01', '2022-07-01T00:00:00+00:00'):
+                with self.subTest(kind=kind, since=since):
+                    rows = self.read_ndjson(self.export(kind, since=since))
+                    self.assertEqual(
+                        [row[field] for row in rows], [self.new.pk])
+
+    def test_bad_requests(self):
+        for kind, params in (
+                ('titles', {'since': '2022-01-01'}),
+                ('reviews', {'since': 'вчера'}),
+                ('reviews', {'output': 'xml'}),
+                ('users', {})):
+            with self.subTest(kind=kind, params=params):
+                self.assertEqual(self.export(kind, **params).status_code, 400)
+
+
+class ExportCatalogueCommandTest(ExportDataMixin, TestCase):
+
+    def snapshot(self):
+        return {
+            'titles': list(Title.objects.values_list(
+                'pk', 'name', 'category__slug', 'rating', 'reviews_count')),
+            'genres': list(Title.genre.through.objects.order_by(
+                'pk').values_list('title_id', 'genre__slug')),
+            'reviews': list(Review.objects.order_by('pk').values_list(
+                'pk', 'title_id', 'author__username', 'text', 'score',
+                'pub_date')),
+            'comments': list(Comment.objects.order_by('pk').values_list(
+                'pk', 'review_id', 'author__username', 'text', 'pub_date')),
+        }
+
+    def test_export_can_be_imported(self):
+        expected = self.snapshot()
+        with tempfile.TemporaryDirectory() as directory:
+            for kind, name, output in (('titles', 'titles.jsonl', 'ndjson'),
+                                       ('reviews', 'review.csv', 'csv'),
+                                       ('comments', 'comments.csv', 'csv')):
+                call_command('export_catalogue', kind, '--output', output,
+                             '--file', os.path.join(directory, name))
+            Title.objects.all().delete()
+            call_command('import_catalogue', directory, stdout=io.StringIO())
+        self.assertEqual(self.snapshot(), expected)
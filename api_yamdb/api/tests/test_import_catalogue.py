@@ -0,0 +1,67 @@
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+FILES = {
+    'category.csv': 'id,name,slug\n1,Фильм,1984\n1984,Книга,book\n',
+    'genre.csv': 'id,name,slug\n1,Драма,drama\n',
+    'users.csv': ('id,username,email\n'
+                  '5,2001,numeric@yamdb.com\n2001,bob,bob@yamdb.com\n'),
+    'titles.jsonl': (
+        json.dumps({'id': 1, 'name': 'Title', 'year': 2000,
+                    'category': '1984'}) + '\n'
+        + json.dumps({'id': 2, 'name': 'Other', 'year': 2000,
+                      'category_id': 1984}) + '\n'),
+    'genre_title.csv': 'id,title_id,genre\n1,1,drama\n',
+    'review.csv': ('id,title_id,text,author,author_id,score,pub_date\n'
+                   '1,1,-,2001,,4,2022-01-01T00:00:00Z\n'
+                   '2,1,-,,2001,8,\n'),
+    'comments.jsonl': json.dumps(
+        {'id': 1, 'review_id': 1, 'text': '-', 'author': 2001}) + '\n',
+}
+
+
+class ImportCatalogueTest(TestCase):
+
+    def import_files(self, files):
+        with tempfile.TemporaryDirectory() as directory:
+            for name, content in files.items():
+                with open(os.path.join(directory, name), 'w',
+                          encoding='utf-8') as target:
+                    target.write(content)
+            call_command('import_catalogue', directory, stdout=io.StringIO())
+
+    def test_references_are_resolved_by_column_name(self):
+        self.import_files(FILES)
+        first, second = Title.objects.order_by('pk')
+        self.assertEqual(first.category.slug, '1984')
+        self.assertEqual(second.category.slug, 'book')
+        self.assertEqual(list(first.genre.values_list('slug', flat=True)),
+                         ['drama'])
+        self.assertEqual(
+            dict(Review.objects.values_list('pk', 'author__username')),
+            {1: '2001', 2: 'bob'})
+        self.assertEqual(Comment.objects.get().author.username, '2001')
+        self.assertEqual((first.rating, first.reviews_count), (6, 2))
+
+    def test_failed_import_changes_nothing(self):
+        files = dict(FILES)
+        files['review.csv'] = 'id,title_id,text,author,score\n1,1,-,eve,4\n'
+        with self.assertRaisesMessage(CommandError, "User 'eve' не найден"):
+            self.import_files(files)
+        for model in (Category, Genre, User, Title, Review):
+            self.assertFalse(model.objects.exists(), model.__name__)
+
+    def test_score_out_of_range(self):
+        files = dict(FILES)
+        files['review.csv'] = (
+            'id,title_id,text,author,score\n1,1,-,bob,4\n2,1,-,bob,11\n')
+        with self.assertRaisesMessage(
+                CommandError, 'review.csv:3: оценка 11 вне диапазона 1–10'):
+            self.import_files(files)
+        self.assertFalse(Review.objects.exists())
@@ -0,0 +1,27 @@
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+from reviews.leaderboards import TOP
+from reviews.models import Review, Title, TitleRanking, User
+
+
+class LeaderboardTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create(
+            username='author', email='author@yamdb.com')
+        cls.rated = Title.objects.create(
+            name='Rated', year=2000, description='-')
+        Review.objects.create(
+            title=cls.rated, author=author, text='-', score=7)
+        Title.objects.create(name='Unrated', year=2000, description='-')
+
+    def test_titles_without_rating_are_not_ranked(self):
+        call_command('refresh_leaderboards', '--kind', TOP,
+                     '--min-reviews', '0', stdout=io.StringIO())
+        self.assertEqual(
+            list(TitleRanking.objects.filter(board=TOP).values_list(
+                'title_id', 'score')),
+            [(self.rated.pk, 7)])
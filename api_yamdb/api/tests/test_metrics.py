@@ -0,0 +1,89 @@
+import json
+import os
+import runpy
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from api import metrics
+from django.conf import settings
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import Category, Comment, Review, Title, User
+
+
+@override_settings(API_METRICS=True, API_METRICS_SAMPLE_RATE=1,
+                   API_CACHE_TIMEOUT=0)
+class MetricsTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(
+            username='admin', email='admin@yamdb.com', role=User.ADMIN)
+        cls.title = Title.objects.create(
+            name='Title', year=2000, description='-',
+            category=Category.objects.create(name='Фильм', slug='film'))
+        cls.review = Review.objects.create(
+            title=cls.title, author=cls.admin, text='-', score=5)
+        Comment.objects.create(review=cls.review, author=cls.admin, text='-')
+
+    def setUp(self):
+        metrics.reset()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.admin)}')
+
+    def test_reviews_and_comments_are_reported_separately(self):
+        reviews = f'/api/v1/titles/{self.title.id}/reviews/'
+        comments = f'{reviews}{self.review.id}/comments/'
+        for url in (reviews, comments, comments, f'{reviews}0/'):
+            self.client.get(url)
+        response = self.client.get('/api/v1/metrics/')
+        self.assertEqual(response.status_code, 200)
+        lines = response.content.decode().splitlines()
+        for line in (
+            'yamdb_responses_total{route="/api/v1/titles/<title_id>'
+            '/reviews/",method="GET",status="200"} 1',
+            'yamdb_responses_total{route="/api/v1/titles/<title_id>'
+            '/reviews/<review_id>/comments/",method="GET",status="200"} 2',
+            'yamdb_responses_total{route="/api/v1/titles/<title_id>'
+            '/reviews/<pk>/",method="GET",status="404"} 1',
+            'yamdb_db_queries_count{route="/api/v1/titles/<title_id>'
+            '/reviews/<review_id>/comments/"} 2',
+            'yamdb_request_duration_seconds_bucket{route="/api/v1/titles/'
+            '<title_id>/reviews/",le="+Inf"} 1',
+        ):
+            with self.subTest(line=line):
+                self.assertIn(line, lines)
+        self.assertIn('# TYPE yamdb_db_queries histogram', lines)
+
+    def test_metrics_are_for_admins_only(self):
+        self.client.credentials()
+        self.assertEqual(
+            self.client.get('/api/v1/metrics/').status_code, 401)
+
+    def test_workers_are_summed_through_directory(self):
+        reviews = f'/api/v1/titles/{self.title.id}/reviews/'
+        line = ('yamdb_responses_total{route="/api/v1/titles/<title_id>'
+                '/reviews/",method="GET",status="200"} ')
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(API_METRICS_DIR=directory):
+                self.client.get(reviews)
+                metrics.flush(force=True)
+                # Файл другого, в том числе завершившегося, воркера
+                with open(os.path.join(directory, '1.json'), 'w') as target:
+                    json.dump(metrics.snapshot(), target)
+                self.client.get(reviews)
+                lines = self.client.get(
+                    '/api/v1/metrics/').content.decode().splitlines()
+                self.assertIn(line + '3', lines)
+                self.assertIn(
+                    'yamdb_db_queries_count{route="/api/v1/titles/'
+                    '<title_id>/reviews/"} 3', lines)
+            with mock.patch.dict(os.environ, {'API_METRICS_DIR': directory}):
+                runpy.run_path(str(
+                    Path(settings.BASE_DIR) / 'api_yamdb' / 'gunicorn.conf.py'
+                ))['on_starting'](SimpleNamespace(cfg=SimpleNamespace(
+                    workers=1)))
+            self.assertEqual(os.listdir(directory), [])
@@ -0,0 +1,85 @@
+import io
+from datetime import timedelta
+from unittest import mock
+
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from reviews.models import OutgoingEmail, User
+
+
+class FailingBackend(BaseEmailBackend):
+
+    def send_messages(self, email_messages):
+        raise ConnectionRefusedError('SMTP недоступен')
+
+
+class OutboxTest(APITestCase):
+    """
+    Регистрация ставит письмо в очередь, а отправляет его send_emails
+    """
+
+    def sign_up(self, username='user'):
+        return self.client.post('/api/v1/auth/signup/', {
+            'username': username, 'email': f'{username}@yamdb.com'})
+
+    def send_emails(self, *args):
+        call_command('send_emails', *args, stdout=io.StringIO())
+
+    def test_sign_up_queues_email(self):
+        response = self.sign_up()
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(mail.outbox, [])
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(
+            (email.recipient, email.status, email.attempts),
+            ('user@yamdb.com', OutgoingEmail.PENDING, 0))
+        self.assertIn('confirmation_code', email.message)
+        self.assertTrue(User.objects.filter(username='user').exists())
+
+    def test_sign_up_is_one_transaction(self):
+        with mock.patch.object(
+                OutgoingEmail.objects, 'create', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.sign_up()
+        self.assertFalse(User.objects.exists())
+        self.assertFalse(OutgoingEmail.objects.exists())
+
+    def test_send_emails(self):
+        for username in ('first', 'second', 'third'):
+            self.sign_up(username)
+        self.send_emails('--batch-size', '2')
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            ['first@yamdb.com', 'second@yamdb.com', 'third@yamdb.com'])
+        self.assertFalse(OutgoingEmail.objects.exclude(
+            status=OutgoingEmail.SENT).exists())
+        self.assertFalse(OutgoingEmail.objects.filter(
+            sent_at__isnull=True).exists())
+        self.send_emails()
+        self.assertEqual(len(mail.outbox), 3)
+
+    @override_settings(EMAIL_BACKEND='api.tests.test_outbox.FailingBackend')
+    def test_failed_sending_is_retried(self):
+        self.sign_up()
+        started = timezone.now()
+        self.send_emails('--max-attempts', '2', '--backoff', '60')
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(
+            (email.status, email.attempts, email.last_error),
+            (OutgoingEmail.PENDING, 1, 'SMTP недоступен'))
+        self.assertGreaterEqual(
+            email.next_attempt_at, started + timedelta(seconds=60))
+        self.send_emails('--max-attempts', '2')
+        self.assertEqual(OutgoingEmail.objects.get().attempts, 1)
+        OutgoingEmail.objects.update(next_attempt_at=started)
+        self.send_emails('--max-attempts', '2')
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(
+            (email.status, email.attempts), (OutgoingEmail.FAILED, 2))
+        self.assertIsNone(email.sent_at)
+        self.assertEqual(mail.outbox, [])
@@ -0,0 +1,112 @@
+import base64
+import datetime
+from urllib.parse import parse_qs, urlparse
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from reviews.models import Comment, Review, Title, User
+
+PUB_DATE = datetime.datetime(2022, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+@override_settings(API_CACHE_TIMEOUT=0)
+class PaginationTest(APITestCase):
+    """
+    Курсор отзывов и комментариев идёт по (pub_date, id): страницы не
+    теряют и не повторяют записи с одинаковой датой
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.title = Title.objects.create(
+            name='Title', year=2000, description='-')
+        cls.reviews = [
+            Review.objects.create(
+                title=cls.title, text='-', score=5,
+                author=User.objects.create(
+                    username=f'author{number}',
+                    email=f'author{number}@yamdb.com'))
+            for number in range(12)]
+        first = cls.reviews[0]
+        for review in cls.reviews[1:]:
+            Comment.objects.create(review=first, author=review.author,
+                                   text='-')
+        # У всех записей, кроме первой и последней, одна дата: как
+        # после импорта
+        for model in (Review, Comment):
+            model.objects.update(pub_date=PUB_DATE)
+            queryset = model.objects.order_by('pk')
+            model.objects.filter(pk=queryset.first().pk).update(
+                pub_date=PUB_DATE + datetime.timedelta(days=1))
+            model.objects.filter(pk=queryset.last().pk).update(
+                pub_date=PUB_DATE - datetime.timedelta(days=1))
+
+    def get(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def assert_keyset_order(self, url, model, **filters):
+        expected = list(model.objects.filter(**filters).order_by(
+            'pub_date', 'id').values_list('id', flat=True))
+        forward, pages = [], []
+        data = self.get(url, pagination='cursor')
+        while True:
+            pages.append([item['id'] for item in data['results']])
+            forward.extend(pages[-1])
+            if data['next'] is None:
+                break
+            data = self.get(data['next'])
+        self.assertEqual(forward, expected)
+        for page in reversed(pages[:-1]):
+            data = self.get(data['previous'])
+            self.assertEqual([item['id'] for item in data['results']], page)
+        self.assertIsNone(data['previous'])
+
+    def test_cursor_with_equal_pub_dates(self):
+        reviews = f'/api/v1/titles/{self.title.pk}/reviews/'
+        for values_list in (True, False):
+            with self.subTest(values_list=values_list), override_settings(
+                    API_VALUES_LIST=values_list):
+                self.assert_keyset_order(
+                    reviews, Review, title=self.title)
+                self.assert_keyset_order(
+                    f'{reviews}{self.reviews[0].pk}/comments/', Comment,
+                    review=self.reviews[0])
+
+    def test_cursor_does_not_use_offset(self):
+        url = f'/api/v1/titles/{self.title.pk}/reviews/'
+        data = self.get(url, pagination='cursor')
+        data = self.get(data['next'])
+        with CaptureQueriesContext(connection) as context:
+            self.get(data['next'])
+        self.assertFalse([
+            query['sql'] for query in context.captured_queries
+            if 'OFFSET' in query['sql']])
+
+    def test_invalid_cursor(self):
+        url = f'/api/v1/titles/{self.title.pk}/reviews/'
+        for position in ('["x"]', '["x", "1"]', '{}', 'x'):
+            cursor = base64.b64encode(
+                f'p={position}'.encode()).decode()
+            with self.subTest(position=position):
+                self.assertEqual(
+                    self.client.get(url, {'cursor': cursor}).status_code,
+                    404)
+
+    def test_count(self):
+        url = f'/api/v1/titles/{self.title.pk}/reviews/'
+        self.assertEqual(self.get(url)['count'], len(self.reviews))
+        data = self.get(url, count='false')
+        self.assertNotIn('count', data)
+        self.assertEqual(len(data['results']), 5)
+        self.assertEqual(
+            parse_qs(urlparse(data['next']).query), {
+                'count': ['false'], 'page': ['2']})
+        data = self.get(data['next'])
+        self.assertNotIn('count', data)
+        self.assertEqual(
+            parse_qs(urlparse(data['previous']).query), {
+                'count': ['false']})
@@ -0,0 +1,163 @@
+import re
+
+from api import catalogue, usernames
+from api.urls import r_v1
+from api.views import GetToken, SignUp
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.leaderboards import refresh_leaderboards
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+URL_KWARG = re.compile(r'\(\?P<(\w+)>[^)]*\)')
+# Маршрут без review_id: CommentViewSet на нём всегда отвечает 404
+SKIPPED_PREFIXES = ('comments',)
+SIZES = (1, 50)
+
+
+@override_settings(API_CACHE_TIMEOUT=0)
+class QueryBudgetTest(APITestCase):
+    """
+    Для каждого маршрута r_v1, а также SignUp и GetToken, число запросов
+    к БД не превышает query_budget представления и не зависит от числа
+    связанных объектов
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(
+            username='admin', email='admin@yamdb.com', role=User.ADMIN)
+
+    def setUp(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.admin)}')
+
+    def seed(self, size):
+        categories = [
+            Category.objects.create(
+                name=f'c{number}', slug=f'c{size}-{number}')
+            for number in range(size)]
+        genres = [
+            Genre.objects.create(name=f'g{number}', slug=f'g{size}-{number}')
+            for number in range(size)]
+        users = [
+            User.objects.create(
+                username=f'user{size}_{number}',
+                email=f'user{size}_{number}@yamdb.com')
+            for number in range(size)]
+        titles = []
+        for number in range(size):
+            title = Title.objects.create(
+                name=f'Title {size} {number}', year=2000, description='-',
+                category=categories[number])
+            title.genre.set(genres)
+            titles.append(title)
+        reviews = [
+            Review.objects.create(
+                title=titles[0], author=author, text='-', score=5)
+            for author in users]
+        for author in users:
+            Comment.objects.create(review=reviews[0], author=author, text='-')
+        refresh_leaderboards()
+        return {
+            'title_id': titles[0].pk,
+            'review_id': reviews[0].pk,
+            'kind': 'top',
+            'category': categories[0].slug,
+            'genres': [genre.slug for genre in genres],
+        }
+
+    def payloads(self, size, context):
+        return {
+            'users': {
+                'username': f'new{size}', 'email': f'new{size}@yamdb.com'},
+            'categories': {'name': 'new', 'slug': f'new-c{size}'},
+            'genres': {'name': 'new', 'slug': f'new-g{size}'},
+            'titles': {
+                'name': 'new', 'year': 2000, 'description': '-',
+                'category': context['category'],
+                'genre': context['genres']},
+            r'titles/(?P<title_id>\d+)/reviews': {'text': '-', 'score': 5},
+            r'titles/(?P<title_id>\d+)/reviews/(?P<review_id>\d+)/comments': {
+                'text': '-'},
+        }
+
+    def get_lookup(self, viewset, kwargs):
+        view = viewset(
+            kwargs=kwargs, action_map={'get': 'retrieve'}, format_kwarg=None)
+        view.request = view.initialize_request(
+            APIRequestFactory().get('/'))
+        obj = view.get_queryset().order_by('pk').first()
+        return getattr(obj, view.lookup_field)
+
+    def count_queries(self, method, url, data=None):
+        """
+        Число запросов к БД; None, если метод закрыт (405)
+        """
+        catalogue.get_catalogue()
+        usernames.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method)(url, data, format='json')
+        if response.status_code == status.HTTP_405_METHOD_NOT_ALLOWED:
+            return None
+        self.assertLess(
+            response.status_code, 400,
+            f'{method.upper()} {url}: {response.content[:200]}')
+        return len(context)
+
+    def measure_routes(self, size):
+        context = self.seed(size)
+        counts = {}
+        for prefix, viewset, _ in r_v1.registry:
+            if prefix in SKIPPED_PREFIXES:
+                continue
+            kwargs = {
+                name: context[name] for name in URL_KWARG.findall(prefix)}
+            url = '/api/v1/' + URL_KWARG.sub(
+                lambda match: str(context[match.group(1)]), prefix) + '/'
+            counts[viewset, 'list'] = self.count_queries('get', url)
+            if hasattr(viewset, 'retrieve'):
+                lookup = self.get_lookup(viewset, kwargs)
+                counts[viewset, 'retrieve'] = self.count_queries(
+                    'get', f'{url}{lookup}/')
+            payload = self.payloads(size, context).get(prefix)
+            if hasattr(viewset, 'create') and payload is not None:
+                counts[viewset, 'create'] = self.count_queries(
+                    'post', url, payload)
+        user = User.objects.get(username=f'user{size}_0')
+        self.client.credentials()
+        counts[SignUp, 'post'] = self.count_queries(
+            'post', '/api/v1/auth/signup/',
+            {'username': f'signup{size}', 'email': f'signup{size}@ya.ru'})
+        counts[GetToken, 'post'] = self.count_queries(
+            'post', '/api/v1/auth/token/',
+            {'username': user.username,
+             'confirmation_code': default_token_generator.make_token(user)})
+        self.setUp()
+        return counts
+
+    def test_query_counts_within_budget_and_constant(self):
+        results = [self.measure_routes(size) for size in SIZES]
+        for (view, action), count in results[-1].items():
+            if count is None:
+                continue
+            with self.subTest(view=view.__name__, action=action):
+                budget = getattr(view, 'query_budget', {}).get(action)
+                self.assertIsNotNone(
+                    budget, f'{view.__name__}.query_budget["{action}"]')
+                self.assertLessEqual(count, budget)
+                self.assertEqual(
+                    [counts[view, action] for counts in results],
+                    [count] * len(SIZES))
+
+
+@override_settings(API_VALUES_LIST=False)
+class SerializerQueryBudgetTest(QueryBudgetTest):
+    """
+    То же для списков через сериализаторы (plan_queryset,
+    AuthorListSerializer, CatalogueField), а не api.readers
+    """
@@ -0,0 +1,94 @@
+from api import catalogue, usernames
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+
+class QueryPlanTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(
+            username='admin', email='admin@yamdb.com', role=User.ADMIN)
+        cls.category = Category.objects.create(name='Фильм', slug='film')
+        cls.genres = [
+            Genre.objects.create(name='Драма', slug='drama'),
+            Genre.objects.create(name='Комедия', slug='comedy'),
+        ]
+
+    def setUp(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.admin)}')
+
+    def seed(self, size):
+        titles = []
+        for number in range(size):
+            title = Title.objects.create(
+                name=f'Title {number}', year=2000, description='-',
+                category=self.category)
+            title.genre.set(self.genres)
+            titles.append(title)
+        title = titles[0]
+        reviews = []
+        for number in range(size):
+            author = User.objects.create(
+                username=f'user{size}_{number}',
+                email=f'user{size}_{number}@yamdb.com')
+            reviews.append(Review.objects.create(
+                title=title, author=author, text='-', score=5))
+            Comment.objects.create(
+                review=reviews[0], author=author, text='-')
+        return title, reviews[0]
+
+    def count_queries(self, url):
+        catalogue.get_catalogue()
+        usernames.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def urls(self, title, review):
+        return (
+            '/api/v1/titles/',
+            f'/api/v1/titles/{title.id}/reviews/',
+            f'/api/v1/titles/{title.id}/reviews/?expand=title',
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/',
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+            '?expand=review.title',
+            '/api/v1/users/',
+        )
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        single = [self.count_queries(url) for url in self.urls(*self.seed(1))]
+        full = [self.count_queries(url) for url in self.urls(*self.seed(5))]
+        self.assertEqual(single, full)
+
+    def test_nested_routes_check_parent_title(self):
+        title, review = self.seed(1)
+        other = Title.objects.create(
+            name='Other', year=2000, description='-', category=self.category)
+        comment = review.comments.get()
+        for url in (
+            f'/api/v1/titles/{other.id}/reviews/{review.id}/',
+            f'/api/v1/titles/{other.id}/reviews/{review.id}/comments/',
+            f'/api/v1/titles/{other.id}/reviews/{review.id}/comments/'
+            f'{comment.id}/',
+            f'/api/v1/titles/{title.id + 100}/reviews/',
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+        response = self.client.post(
+            f'/api/v1/titles/{other.id}/reviews/{review.id}/comments/',
+            {'text': '-'})
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(API_VALUES_LIST=False)
+class SerializerQueryPlanTest(QueryPlanTest):
+    """
+    То же для списков через сериализаторы, а не api.readers
+    """
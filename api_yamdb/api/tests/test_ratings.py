@@ -0,0 +1,111 @@
+import io
+
+from django.core.management import call_command
+from django.db.models import Avg, Count, Sum
+from django.test import TestCase
+from reviews.models import Review, Title, TitleScoreStats, User
+
+
+class StoredRatingTest(TestCase):
+    """
+    Рейтинг, число и сумма оценок и гистограмма, хранимые у произведения,
+    совпадают с агрегатами по таблице отзывов после любых изменений
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.titles = [
+            Title.objects.create(name=f'Title {number}', year=2000,
+                                 description='-')
+            for number in range(2)]
+        cls.authors = [
+            User.objects.create(
+                username=f'author{number}',
+                email=f'author{number}@yamdb.com')
+            for number in range(3)]
+
+    def review(self, author, score, title=None):
+        return Review.objects.create(
+            title=title or self.titles[0], author=self.authors[author],
+            text='-', score=score)
+
+    def assert_consistent(self):
+        for title in Title.objects.all():
+            reviews = Review.objects.filter(title=title).aggregate(
+                rating=Avg('score'), count=Count('pk'), total=Sum('score'))
+            with self.subTest(title=title.name):
+                self.assertEqual(title.reviews_count, reviews['count'])
+                self.assertEqual(title.score_sum, reviews['total'] or 0)
+                if reviews['rating'] is None:
+                    self.assertIsNone(title.rating)
+                else:
+                    self.assertAlmostEqual(title.rating, reviews['rating'])
+                stats = TitleScoreStats.objects.filter(title=title).first()
+                histogram = {
+                    score: n for score, n in (
+                        stats.histogram.items() if stats else ()) if n}
+                self.assertEqual(histogram, dict(
+                    Review.objects.filter(title=title).values_list(
+                        'score').annotate(n=Count('pk')).order_by()))
+
+    def test_create(self):
+        self.review(0, 4)
+        self.review(1, 9)
+        self.assert_consistent()
+        self.assertEqual(Title.objects.get(pk=self.titles[0].pk).rating, 6.5)
+
+    def test_score_change(self):
+        review = self.review(0, 4)
+        self.review(1, 9)
+        review.score = 10
+        review.save()
+        self.assert_consistent()
+        review = Review.objects.get(pk=review.pk)
+        review.score = 1
+        review.save()
+        self.assert_consistent()
+
+    def test_move_to_another_title(self):
+        review = self.review(0, 4)
+        self.review(1, 9)
+        review = Review.objects.get(pk=review.pk)
+        review.title = self.titles[1]
+        review.score = 7
+        review.save()
+        self.assert_consistent()
+
+    def test_save_of_partially_loaded_review(self):
+        review = self.review(0, 4)
+        review = Review.objects.only('pk', 'text').get(pk=review.pk)
+        review.title_id = self.titles[1].pk
+        review.save()
+        self.assert_consistent()
+
+    def test_delete(self):
+        review = self.review(0, 4)
+        self.review(1, 9)
+        review.delete()
+        self.assert_consistent()
+        Review.objects.all().delete()
+        self.assert_consistent()
+        self.assertIsNone(Title.objects.get(pk=self.titles[0].pk).rating)
+
+    def test_author_and_title_delete_cascade(self):
+        self.review(0, 4)
+        self.review(1, 9)
+        self.review(0, 2, title=self.titles[1])
+        User.objects.filter(pk=self.authors[0].pk).delete()
+        self.assert_consistent()
+        Title.objects.filter(pk=self.titles[0].pk).delete()
+        self.assert_consistent()
+
+    def test_rebuild_ratings(self):
+        self.review(0, 4)
+        self.review(1, 9, title=self.titles[1])
+        Title.objects.update(rating=1, reviews_count=7, score_sum=7)
+        TitleScoreStats.objects.all().delete()
+        call_command('rebuild_ratings', self.titles[0].pk,
+                     stdout=io.StringIO())
+        self.assertEqual(Title.objects.get(pk=self.titles[1].pk).rating, 1)
+        call_command('rebuild_ratings', stdout=io.StringIO())
+        self.assert_consistent()
@@ -0,0 +1,56 @@
+from api import usernames
+from api.readers import get_reader
+from api.serializers import (CommentSerializer, ReviewSerializer,
+                             TitleGeneralSerializer, TitleRankingSerializer)
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from reviews.models import Review, Title
+from reviews.synthetic import generate
+
+
+@override_settings(API_CACHE_TIMEOUT=0)
+class ValuesListTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        generate(users=8, titles=7, categories=2, genres=4,
+                 reviews_per_title=7, comments_per_review=7)
+        Title.objects.create(name='Без категории', year=1999, description='')
+        Title.objects.filter(
+            pk=Title.objects.order_by('pk').first().pk).update(rating=None)
+        cls.review = Review.objects.order_by('pk').first()
+
+    def get(self, url, fast):
+        usernames.clear()
+        with override_settings(API_VALUES_LIST=fast):
+            response = APIClient().get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response
+
+    def test_output_is_identical_to_serializers(self):
+        title_id, review_id = self.review.title_id, self.review.pk
+        urls = [
+            f'{prefix}{query}'
+            for prefix in (
+                '/api/v1/titles/',
+                f'/api/v1/titles/{title_id}/reviews/',
+                f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+            )
+            for query in ('', '?page=2', '?count=false',
+                          '?pagination=cursor', '?pagination=page&page=1')
+        ]
+        urls.append('/api/v1/titles/?genre=bench-g1&year=2000')
+        for url in urls:
+            with self.subTest(url=url):
+                fast = self.get(url, True)
+                self.assertEqual(fast.content, self.get(url, False).content)
+                cursor = fast.data.get('next')
+                if cursor and 'cursor=' in cursor:
+                    self.assertEqual(self.get(cursor, True).content,
+                                     self.get(cursor, False).content)
+
+    def test_reader_is_built_only_for_supported_serializers(self):
+        for serializer_class in (
+                TitleGeneralSerializer, ReviewSerializer, CommentSerializer):
+            self.assertIsNotNone(get_reader(serializer_class))
+        self.assertIsNone(get_reader(TitleRankingSerializer))
@@ -0,0 +1,90 @@
+import datetime
+import decimal
+import io
+import uuid
+
+from api.benchmark import measure_rendering
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer
+from django.test import TestCase, override_settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from reviews.models import Title
+from reviews.synthetic import generate
+
+
+@override_settings(API_CACHE_TIMEOUT=0)
+class FastJSONTest(TestCase):
+
+    def assert_same_bytes(self, data, **kwargs):
+        self.assertEqual(
+            FastJSONRenderer().render(data, **kwargs),
+            JSONRenderer().render(data, **kwargs))
+
+    def test_api_responses_are_byte_compatible(self):
+        generate(users=5, titles=4, categories=2, genres=3,
+                 reviews_per_title=3, comments_per_review=1)
+        title = Title.objects.order_by('pk').first()
+        client = APIClient()
+        for url in ('/api/v1/titles/', f'/api/v1/titles/{title.id}/',
+                    f'/api/v1/titles/{title.id}/stats/',
+                    f'/api/v1/titles/{title.id}/reviews/?expand=title',
+                    '/api/v1/categories/', '/api/v1/genres/'):
+            with self.subTest(url=url):
+                response = client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assert_same_bytes(response.data)
+        for name, timings in measure_rendering(rounds=1).items():
+            self.assertEqual(len(timings), 2, name)
+
+    def test_values_outside_json_are_byte_compatible(self):
+        self.assert_same_bytes({
+            'datetime': datetime.datetime(
+                2022, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc),
+            'date': datetime.date(2022, 1, 2),
+            'time': datetime.time(3, 4, 5, 678901),
+            'timedelta': datetime.timedelta(seconds=90),
+            'decimal': decimal.Decimal('7.50'),
+            'uuid': uuid.UUID(int=1),
+            'separators': 'a\u2028b\u2029c',
+            'text': 'Драма',
+            1: [1.5, None, True, 2 ** 70],
+        })
+        self.assert_same_bytes({'a': 1}, accepted_media_type=(
+            'application/json; indent=4'))
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_floats_are_byte_compatible(self):
+        for value in (0.0, -0.0, 0.5, 1e-4, 1e15 + 0.5, 1e-7, -2.5e-5, 1e16,
+                      1.5e300, decimal.Decimal('1E-7'), {1e-7: 1},
+                      [{'a': [1e20]}], '1e5', 'x 2e3 y'):
+            with self.subTest(value=value):
+                self.assert_same_bytes({'a': value})
+
+    def test_non_finite_floats(self):
+        for value in (float('nan'), float('inf'),
+                      decimal.Decimal('-Infinity')):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    JSONRenderer().render({'a': value})
+                self.assertEqual(
+                    FastJSONRenderer().render({'a': value}), b'{"a":null}')
+                renderer, fast = JSONRenderer(), FastJSONRenderer()
+                renderer.strict = fast.strict = False
+                self.assertEqual(
+                    fast.render({'a': [value]}),
+                    renderer.render({'a': [value]}))
+
+    def test_parser_matches_json_parser(self):
+        for body in (b'{"name": "\xd0\x94", "year": 2000, "genre": ["a"]}',
+                     b'{"big": 123456789012345678901234567890}',
+                     b'["\\ud800"]'):
+            with self.subTest(body=body):
+                self.assertEqual(
+                    FastJSONParser().parse(io.BytesIO(body)),
+                    JSONParser().parse(io.BytesIO(body)))
+        for body in (b'{"a": NaN}', b'{"a": '):
+            with self.subTest(body=body), self.assertRaises(ParseError):
+                FastJSONParser().parse(io.BytesIO(body))
@@ -0,0 +1,54 @@
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import Review, Title, User
+
+
+@override_settings(API_CACHE_TIMEOUT=0)
+class ReviewCreateTest(APITestCase):
+    """
+    Повторный отзыв отсекает ограничение в БД, а не запрос перед вставкой
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(
+            username='author', email='author@yamdb.com')
+        cls.title = Title.objects.create(
+            name='Title', year=2000, description='-')
+
+    def setUp(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.author)}')
+
+    def post_review(self, score):
+        return self.client.post(
+            f'/api/v1/titles/{self.title.pk}/reviews/',
+            {'text': '-', 'score': score})
+
+    def test_no_duplicate_check_before_insert(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.post_review(7)
+        self.assertEqual(response.status_code, 201, response.content)
+        table = Review._meta.db_table
+        queries = [query['sql'] for query in context.captured_queries]
+        insert = next(index for index, sql in enumerate(queries)
+                      if sql.startswith(f'INSERT INTO "{table}"'))
+        self.assertFalse([
+            sql for sql in queries[:insert]
+            if sql.startswith('SELECT') and f'FROM "{table}"' in sql])
+
+    def test_second_review_is_rejected(self):
+        self.post_review(7)
+        response = self.post_review(2)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json(), {'non_field_errors': ['Отзыв уже есть']})
+        self.assertEqual(
+            list(Review.objects.values_list('author_id', 'score')),
+            [(self.author.pk, 7)])
+        title = Title.objects.get(pk=self.title.pk)
+        self.assertEqual(
+            (title.rating, title.reviews_count, title.score_sum), (7, 1, 7))
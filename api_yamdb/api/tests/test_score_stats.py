@@ -0,0 +1,109 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase
+from reviews.models import Review, Title, TitleScoreStats, User
+
+
+def stats(histogram):
+    return TitleScoreStats(
+        **{f'score_{score}': n for score, n in histogram.items()})
+
+
+class TitleScoreStatsTest(TestCase):
+
+    def test_median(self):
+        for scores, median in (
+                ({5: 1}, 5),
+                ({2: 1, 9: 2}, 9),
+                ({1: 2, 3: 1, 10: 2}, 3),
+                ({4: 1, 7: 1}, 5.5),
+                ({4: 2, 7: 2}, 5.5),
+                ({4: 3, 7: 1}, 4),
+                ({1: 1, 2: 1, 9: 1, 10: 1}, 5.5)):
+            with self.subTest(scores=scores):
+                self.assertEqual(stats(scores).median, median)
+
+    def test_mean(self):
+        self.assertEqual(stats({1: 1, 2: 2}).mean, 1.67)
+        self.assertEqual(stats({9: 1, 10: 2}).mean, 9.67)
+        self.assertEqual(stats({4: 1, 7: 1}).mean, 5.5)
+
+    def test_empty(self):
+        empty = stats({})
+        self.assertEqual(
+            (empty.count, empty.mean, empty.median), (0, None, None))
+
+
+class ScoreHistogramTest(TestCase):
+    """
+    Гистограмма оценок обновляется сигналами отзывов
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.titles = [
+            Title.objects.create(name=f'Title {number}', year=2000,
+                                 description='-')
+            for number in range(2)]
+        cls.authors = [
+            User.objects.create(
+                username=f'author{number}',
+                email=f'author{number}@yamdb.com')
+            for number in range(2)]
+
+    def histogram(self, title):
+        scores = TitleScoreStats.objects.get(title=title).histogram
+        return {score: n for score, n in scores.items() if n}
+
+    def test_review_changes(self):
+        first, second = self.titles
+        review = Review.objects.create(
+            title=first, author=self.authors[0], text='-', score=4)
+        Review.objects.create(
+            title=first, author=self.authors[1], text='-', score=7)
+        self.assertEqual(self.histogram(first), {4: 1, 7: 1})
+        review.score = 7
+        review.save()
+        self.assertEqual(self.histogram(first), {7: 2})
+        review.title = second
+        review.save()
+        self.assertEqual(self.histogram(first), {7: 1})
+        self.assertEqual(self.histogram(second), {7: 1})
+        review.delete()
+        self.assertEqual(self.histogram(second), {})
+
+
+@override_settings(API_CACHE_TIMEOUT=0)
+class TitleStatsViewTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.title = Title.objects.create(
+            name='Title', year=2000, description='-')
+
+    def get_stats(self, pk):
+        return self.client.get(f'/api/v1/titles/{pk}/stats/')
+
+    def test_stats(self):
+        for number, score in enumerate((4, 7)):
+            Review.objects.create(
+                title=self.title, text='-', score=score,
+                author=User.objects.create(
+                    username=f'author{number}',
+                    email=f'author{number}@yamdb.com'))
+        data = self.get_stats(self.title.pk).json()
+        self.assertEqual(
+            (data['count'], data['mean'], data['median']), (2, 5.5, 5.5))
+        self.assertEqual(
+            {score: n for score, n in data['histogram'].items() if n},
+            {'4': 1, '7': 1})
+
+    def test_title_without_reviews(self):
+        response = self.get_stats(self.title.pk)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(
+            (data['count'], data['mean'], data['median']), (0, None, None))
+        self.assertEqual(set(data['histogram'].values()), {0})
+
+    def test_unknown_title(self):
+        self.assertEqual(self.get_stats(self.title.pk + 1).status_code, 404)
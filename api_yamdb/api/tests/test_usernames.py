@@ -0,0 +1,67 @@
+from api import usernames
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import Category, Comment, Review, Title, User
+
+
+class AuthorUsernameTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(
+            username='admin', email='admin@yamdb.com', role=User.ADMIN)
+        cls.title = Title.objects.create(
+            name='Title', year=2000, description='-',
+            category=Category.objects.create(name='Фильм', slug='film'))
+        cls.authors = [
+            User.objects.create(
+                username=f'author{number}',
+                email=f'author{number}@yamdb.com')
+            for number in range(3)]
+        cls.reviews = [
+            Review.objects.create(
+                title=cls.title, author=author, text='-', score=5)
+            for author in cls.authors]
+        for author in cls.authors:
+            Comment.objects.create(
+                review=cls.reviews[0], author=author, text='-')
+
+    def setUp(self):
+        usernames.clear()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.admin)}')
+
+    def get_authors(self, url):
+        return [item['author'] for item in self.client.get(url).json()[
+            'results']]
+
+    def test_cached_usernames_are_not_queried_again(self):
+        url = f'/api/v1/titles/{self.title.id}/reviews/'
+        with CaptureQueriesContext(connection) as cold:
+            self.client.get(url)
+        with CaptureQueriesContext(connection) as warm:
+            self.client.get(url)
+        self.assertEqual(len(cold) - len(warm), 1)
+
+    def test_renamed_author_is_shown_at_once(self):
+        url = f'/api/v1/titles/{self.title.id}/reviews/'
+        self.assertIn('author0', self.get_authors(url))
+        author = self.authors[0]
+        author.username = 'renamed'
+        author.save()
+        authors = self.get_authors(url)
+        self.assertIn('renamed', authors)
+        self.assertNotIn('author0', authors)
+
+    def test_nested_review_authors(self):
+        response = self.client.get(
+            f'/api/v1/titles/{self.title.id}/reviews/{self.reviews[0].id}'
+            '/comments/?expand=review')
+        results = response.json()['results']
+        self.assertEqual(
+            sorted(item['author'] for item in results),
+            ['author0', 'author1', 'author2'])
+        self.assertEqual(
+            {item['review']['author'] for item in results}, {'author0'})
@@ -1,7 +1,8 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import (CategoriesViewSet, CommentViewSet, GenreViewSet, GetToken,
+from .views import (CategoriesViewSet, CommentViewSet, ExportView,
+                    GenreViewSet, GetToken, LeaderboardViewSet, MetricsView,
                     ReviewViewSet, SignUp, TitleViewSet, UserViewSet)
 
 app_name = 'api'
@@ -12,6 +13,8 @@ r_v1.register('users', UserViewSet)
 r_v1.register('categories', CategoriesViewSet)
 r_v1.register('genres', GenreViewSet)
 r_v1.register('titles', TitleViewSet)
+r_v1.register(r'leaderboards/(?P<kind>top|trending)', LeaderboardViewSet,
+              basename='leaderboards')
 r_v1.register('comments', CommentViewSet, basename='reviews')
 r_v1.register(r'titles/(?P<title_id>\d+)/reviews',
               ReviewViewSet, basename='reviews')
@@ -21,5 +24,7 @@ r_v1.register(r'titles/(?P<title_id>\d+)/reviews/(?P<review_id>\d+)/comments',
 urlpatterns = [
     path('v1/auth/signup/', SignUp.as_view(), name='sign_up'),
     path('v1/auth/token/', GetToken.as_view(), name='get_token'),
+    path('v1/export/<str:kind>/', ExportView.as_view(), name='export'),
+    path('v1/metrics/', MetricsView.as_view(), name='metrics'),
     path('v1/', include(r_v1.urls)),
 ]
@@ -0,0 +1,52 @@
+"""
+Имена пользователей по id: LRU-кэш процесса с коротким временем жизни.
+Сохранение пользователя сбрасывает запись в своём процессе, в остальных
+она устаревает через API_USERNAME_CACHE_TTL секунд
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from reviews.models import User
+
+_usernames = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_usernames(user_ids):
+    """
+    {id: username}; пользователи, которых нет в кэше, читаются одним запросом
+    """
+    now = time.monotonic()
+    found, missing = {}, set()
+    with _lock:
+        for user_id in set(user_ids):
+            loaded_at, username = _usernames.get(user_id, (None, None))
+            if (loaded_at is None
+                    or now - loaded_at > settings.API_USERNAME_CACHE_TTL):
+                missing.add(user_id)
+                continue
+            _usernames.move_to_end(user_id)
+            found[user_id] = username
+    if missing:
+        loaded = dict(User.objects.filter(
+            pk__in=missing).values_list('pk', 'username'))
+        with _lock:
+            for user_id, username in loaded.items():
+                _usernames[user_id] = (now, username)
+                _usernames.move_to_end(user_id)
+            while len(_usernames) > settings.API_USERNAME_CACHE_SIZE:
+                _usernames.popitem(last=False)
+        found.update(loaded)
+    return found
+
+
+def forget(user_id):
+    with _lock:
+        _usernames.pop(user_id, None)
+
+
+def clear():
+    with _lock:
+        _usernames.clear()
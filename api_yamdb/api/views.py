@@ -1,35 +1,49 @@
 import uuid
 
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import transaction
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import status, viewsets
+from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import SearchFilter
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
-from rest_framework_simplejwt.tokens import AccessToken
-from reviews.models import Category, Genre, Review, Title, User
+from reviews.export import EXPORTS, FORMATS, export_rows, parse_since, render
+from reviews.leaderboards import TRENDING, board_key
+from reviews.models import (Category, Comment, Genre, OutgoingEmail, Review,
+                            Title, TitleRanking, TitleScoreStats, User)
 
 from api_yamdb.settings import DEFAULT_FROM_EMAIL
 
+from .authentication import get_user_instance, issue_token
+from .cache import CachedResponseMixin, ConditionalGetMixin, title_scopes
 from .filters import TitlesFilter
-from .mixins import ApiViewSet
+from .metrics import SerializerTimingMixin, render_metrics
+from .mixins import (ApiViewSet, BulkWriteMixin, PaginationModeMixin,
+                     QueryPlanMixin, ValuesListMixin)
+from .pagination import (IdCursorPagination, PositionCursorPagination,
+                         PubDateCursorPagination)
 from .permissions import IsAdmin, IsAdminOrReadOnly, IsAuthorOrAdminOrReadOnly
 from .serializers import (AdminSerializer, CategorySerializer,
                           CommentSerializer, GenreSerializer,
                           GetTokenSerializer, ReviewSerializer,
                           SignUpSerializer, TitleGeneralSerializer,
-                          TitleSlugSerializer, UserSerializer)
+                          TitleRankingSerializer, TitleSlugSerializer,
+                          TitleStatsSerializer, UserSerializer)
 
 
-class UserViewSet(ModelViewSet):
+class UserViewSet(ConditionalGetMixin, QueryPlanMixin, SerializerTimingMixin,
+                  ModelViewSet):
     queryset = User.objects.all()
+    cache_scopes = ('users',)
+    # Наибольшее число запросов к БД на действие, см. test_query_budget
+    query_budget = {'list': 3, 'retrieve': 2, 'create': 5}
     serializer_class = UserSerializer
     filter_backends = (SearchFilter,)
     search_fields = ('username',)
@@ -55,7 +69,7 @@ class UserViewSet(ModelViewSet):
         permission_classes=[IsAuthenticated],
     )
     def me(self, request):
-        user = request.user
+        user = get_user_instance(request.user)
         if request.method == 'GET':
             serializer = UserSerializer(user)
             return Response(serializer.data)
@@ -70,28 +84,30 @@ class UserViewSet(ModelViewSet):
 
 class SignUp(APIView):
     """
-    Регистрация по юзернейму и емейлу
+    Регистрация по юзернейму и емейлу.
+    Письмо с кодом ставится в очередь, её разбирает команда send_emails
     """
     permission_classes = (AllowAny,)
+    query_budget = {'post': 6}
 
     def post(self, request):
         serializer = SignUpSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         username = serializer.validated_data.get('username')
         email = serializer.validated_data.get('email')
-        User.objects.create(
-            username=username,
-            email=email
-        )
         confirmation_code = uuid.uuid4()
         subject = 'Подтверждение регистрации'
-
-        send_mail(
-            subject=subject,
-            message=(f'{subject} '
-                     f'\nВаш confirmation_code: {confirmation_code}'),
-            from_email=DEFAULT_FROM_EMAIL,
-            recipient_list=[email])
+        with transaction.atomic():
+            User.objects.create(
+                username=username,
+                email=email
+            )
+            OutgoingEmail.objects.create(
+                subject=subject,
+                message=(f'{subject} '
+                         f'\nВаш confirmation_code: {confirmation_code}'),
+                from_email=DEFAULT_FROM_EMAIL,
+                recipient=email)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
@@ -100,6 +116,7 @@ class GetToken(APIView):
     Получение токена в обмен на код доступа
     """
     permission_classes = (AllowAny,)
+    query_budget = {'post': 1}
 
     def post(self, request):
         serializer = GetTokenSerializer(data=request.data)
@@ -113,7 +130,7 @@ class GetToken(APIView):
 
         confirmation_code = serializer.validated_data.get('confirmation_code')
         if default_token_generator.check_token(user, confirmation_code):
-            token = AccessToken.for_user(user)
+            token = issue_token(user)
             return Response(
                 {'token': str(token)}, status=status.HTTP_200_OK
             )
@@ -121,64 +138,236 @@ class GetToken(APIView):
                         status=status.HTTP_400_BAD_REQUEST)
 
 
-class ReviewViewSet(ModelViewSet):
+class ExportView(APIView):
+    """
+    Потоковая выгрузка произведений, отзывов и комментариев
+    в NDJSON или CSV: ?output=ndjson|csv&since=<ISO 8601>
+    """
+    permission_classes = (IsAdmin,)
+    content_types = {
+        'ndjson': 'application/x-ndjson; charset=utf-8',
+        'csv': 'text/csv; charset=utf-8',
+    }
+
+    def get(self, request, kind):
+        output = request.query_params.get('output', 'ndjson')
+        if kind not in EXPORTS or output not in FORMATS:
+            return Response('Неизвестный тип или формат выгрузки',
+                            status=status.HTTP_400_BAD_REQUEST)
+        since = request.query_params.get('since')
+        if since is not None:
+            since = parse_since(since)
+            if since is None or kind == 'titles':
+                return Response('Некорректный параметр since',
+                                status=status.HTTP_400_BAD_REQUEST)
+        response = StreamingHttpResponse(
+            render(kind, output, export_rows(kind, since)),
+            content_type=self.content_types[output])
+        response['Content-Disposition'] = (
+            f'attachment; filename="{kind}.{output}"')
+        return response
+
+
+class MetricsView(APIView):
+    """
+    Метрики в текстовом формате Prometheus
+    """
+    permission_classes = (IsAdmin,)
+
+    def get(self, request):
+        return HttpResponse(
+            render_metrics(),
+            content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class ReviewViewSet(ConditionalGetMixin, PaginationModeMixin, QueryPlanMixin,
+                    ValuesListMixin, SerializerTimingMixin, ModelViewSet):
     serializer_class = ReviewSerializer
     permission_classes = [IsAuthorOrAdminOrReadOnly]
     pagination_class = PageNumberPagination
+    cursor_pagination_class = PubDateCursorPagination
+    conditional_field = 'pub_date'
+    query_budget = {'list': 6, 'retrieve': 3, 'create': 8}
+    expand_plan = {
+        'title': (('title',), ('title__genre',)),
+    }
+
+    def get_cache_scopes(self):
+        title_id = self.kwargs.get('title_id')
+        scopes = ['authors', f'reviews:{title_id}']
+        if 'title' in self.get_expand():
+            scopes.extend(title_scopes(title_id))
+        return scopes
+
+    def get_title_id(self):
+        """
+        id произведения из URL. Существование проверяется одним запросом
+        за запрос и только для списка и создания: запросы к одному отзыву
+        и так фильтруются по произведению
+        """
+        if not hasattr(self, '_title_id'):
+            title_id = int(self.kwargs['title_id'])
+            if not self.detail and not Title.objects.filter(
+                    pk=title_id).exists():
+                raise Http404
+            self._title_id = title_id
+        return self._title_id
 
     def get_queryset(self):
-        title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
-        return title.reviews_title.all()
+        return self.plan_queryset(
+            Review.objects.filter(title_id=self.get_title_id()))
 
     def perform_create(self, serializer):
-        title_id = self.kwargs.get('title_id')
-        current_title = get_object_or_404(Title, pk=title_id)
-        current_user = self.request.user
-        serializer.save(title=current_title, author=current_user)
+        serializer.save(
+            title_id=self.get_title_id(), author_id=self.request.user.pk)
 
 
-class CommentViewSet(ModelViewSet):
+class CommentViewSet(ConditionalGetMixin, PaginationModeMixin,
+                     QueryPlanMixin, ValuesListMixin, SerializerTimingMixin,
+                     ModelViewSet):
     serializer_class = CommentSerializer
     permission_classes = [IsAuthorOrAdminOrReadOnly]
+    cursor_pagination_class = PubDateCursorPagination
+    conditional_field = 'pub_date'
+    query_budget = {'list': 6, 'retrieve': 3, 'create': 4}
+    expand_plan = {
+        'review': (('review',), ()),
+        'review.title': (
+            ('review__title',), ('review__title__genre',)),
+    }
+
+    def get_cache_scopes(self):
+        scopes = ['authors', f'comments:{self.kwargs.get("review_id")}']
+        expand = self.get_expand()
+        if 'review' in expand:
+            scopes.append(f'reviews:{self.kwargs.get("title_id")}')
+        if 'review.title' in expand:
+            scopes.extend(title_scopes(self.kwargs.get('title_id')))
+        return scopes
+
+    def get_review_id(self):
+        """
+        id отзыва из URL. Что отзыв есть и относится к произведению из URL,
+        проверяется одним запросом за запрос и только для списка и
+        создания: запросы к одному комментарию фильтруются по отзыву
+        и произведению
+        """
+        if not hasattr(self, '_review_id'):
+            try:
+                title_id = int(self.kwargs['title_id'])
+                review_id = int(self.kwargs['review_id'])
+            except KeyError:
+                raise Http404
+            if not self.detail and not Review.objects.filter(
+                    pk=review_id, title_id=title_id).exists():
+                raise Http404
+            self._review_id = review_id
+        return self._review_id
 
     def get_queryset(self):
-        review = get_object_or_404(
-            Review,
-            id=self.kwargs.get("review_id")
-        )
-        return review.comments.all()
+        review_id = self.get_review_id()
+        return self.plan_queryset(Comment.objects.filter(
+            review_id=review_id, review__title_id=self.kwargs['title_id']))
 
     def perform_create(self, serializer):
-        review = get_object_or_404(
-            Review,
-            id=self.kwargs.get("review_id"),
-        )
-        serializer.save(review=review, author=self.request.user)
+        serializer.save(
+            review_id=self.get_review_id(), author_id=self.request.user.pk)
 
 
 class CategoriesViewSet(ApiViewSet):
     queryset = Category.objects.all()
     lookup_field = 'slug'
+    bulk_lookup_field = 'slug'
     serializer_class = CategorySerializer
     permission_classes = (IsAdminOrReadOnly,)
+    cache_scopes = ('categories',)
+    query_budget = {'list': 3, 'create': 3}
 
 
 class GenreViewSet(ApiViewSet):
     queryset = Genre.objects.all()
     lookup_field = 'slug'
+    bulk_lookup_field = 'slug'
     serializer_class = GenreSerializer
     permission_classes = (IsAdminOrReadOnly,)
+    cache_scopes = ('genres',)
+    query_budget = {'list': 3, 'create': 3}
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.all().annotate(
-        Avg('reviews_title__score')
-    ).order_by('id')
+class TitleViewSet(BulkWriteMixin, ConditionalGetMixin, CachedResponseMixin,
+                   PaginationModeMixin, QueryPlanMixin, ValuesListMixin,
+                   SerializerTimingMixin, viewsets.ModelViewSet):
+    queryset = Title.objects.all().order_by('id')
     permission_classes = (IsAdminOrReadOnly,)
+    cache_scopes = ('titles',)
+    query_budget = {'list': 4, 'retrieve': 3, 'create': 6}
+    cursor_pagination_class = IdCursorPagination
+    prefetch_related = ('genre',)
     filter_backends = [DjangoFilterBackend]
     filterset_class = TitlesFilter
 
+    def get_cache_scopes(self):
+        """
+        Список зависит от всех произведений, а страница и статистика
+        произведения — только от него самого
+        """
+        if self.detail:
+            return title_scopes(self.kwargs.get('pk'))
+        return self.cache_scopes
+
     def get_serializer_class(self):
-        if self.action == 'create' or self.action == 'partial_update':
+        if self.action in ('create', 'partial_update', 'bulk'):
             return TitleSlugSerializer
         return TitleGeneralSerializer
+
+    def get_stats(self, request, pk=None):
+        title = get_object_or_404(
+            Title.objects.select_related('score_stats'), pk=pk)
+        try:
+            stats = title.score_stats
+        except TitleScoreStats.DoesNotExist:
+            stats = TitleScoreStats(title=title)
+        return Response(TitleStatsSerializer(stats).data)
+
+    @action(detail=True)
+    def stats(self, request, pk=None):
+        """
+        Число отзывов, средняя и медианная оценка и гистограмма оценок
+        """
+        return self.conditional_response(self.get_stats, request, pk=pk)
+
+
+class LeaderboardViewSet(ConditionalGetMixin, CachedResponseMixin,
+                         QueryPlanMixin, SerializerTimingMixin,
+                         mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    Рейтинги произведений из таблицы, которую пересчитывает команда
+    refresh_leaderboards. Рейтинг лучших можно сузить до категории
+    (?category=<slug>) или жанра (?genre=<slug>)
+    """
+    queryset = TitleRanking.objects.all()
+    serializer_class = TitleRankingSerializer
+    permission_classes = (IsAdminOrReadOnly,)
+    pagination_class = PositionCursorPagination
+    cache_scopes = ('leaderboards', 'titles')
+    query_budget = {'list': 3}
+    select_related = ('title',)
+    prefetch_related = ('title__genre',)
+
+    def get_board(self):
+        kind = self.kwargs['kind']
+        category = self.request.query_params.get('category')
+        genre = self.request.query_params.get('genre')
+        if category and genre:
+            raise ValidationError(
+                'Укажите либо категорию, либо жанр')
+        if kind == TRENDING and (category or genre):
+            raise ValidationError(
+                'Популярные произведения не делятся по категориям и жанрам')
+        return board_key(kind, category=category, genre=genre)
+
+    def get_queryset(self):
+        return super().get_queryset().filter(board=self.get_board())
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
@@ -1,7 +1,15 @@
+"""
+ASGI-точка входа для воркеров uvicorn. В Django 2.2 нет django.core.asgi
+и асинхронных представлений, поэтому WSGI-приложение оборачивается
+в asgiref.wsgi.WsgiToAsgi: соединения, keep-alive и медленных клиентов
+обслуживает цикл событий, а запросы выполняются в пуле из ASGI_THREADS
+потоков
+"""
 import os
 
-from django.core.asgi import get_asgi_application
+from asgiref.wsgi import WsgiToAsgi
+from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
 
-application = get_asgi_application()
+application = WsgiToAsgi(get_wsgi_application())
@@ -0,0 +1,11 @@
+from django.db import connections
+
+
+def check_connections(**kwargs):
+    """
+    Перед запросом закрывает постоянные соединения, которые перестали
+    отвечать (перезапуск PostgreSQL, обрыв сети, таймаут на сервере)
+    """
+    for connection in connections.all():
+        if connection.connection is not None and not connection.is_usable():
+            connection.close()
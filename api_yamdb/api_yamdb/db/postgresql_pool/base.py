@@ -0,0 +1,64 @@
+"""
+PostgreSQL с пулом соединений внутри процесса.
+
+ENGINE = 'api_yamdb.db.postgresql_pool'. Размер пула задаётся в OPTIONS
+ключами pool_min_size и pool_max_size; pool_max_size должен быть не меньше
+числа потоков воркера. Закрытое Django соединение возвращается в пул,
+поэтому имеет смысл сочетать пул с CONN_MAX_AGE = 0.
+"""
+import threading
+
+from django.db.backends.postgresql import base
+from psycopg2 import pool
+
+POOL_OPTIONS = ('pool_min_size', 'pool_max_size', 'pool_health_check')
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        for option in POOL_OPTIONS:
+            conn_params.pop(option, None)
+        return conn_params
+
+    def get_pool(self, conn_params):
+        with _pools_lock:
+            if self.alias not in _pools:
+                options = self.settings_dict['OPTIONS']
+                _pools[self.alias] = pool.ThreadedConnectionPool(
+                    options.get('pool_min_size', 1),
+                    options.get('pool_max_size', 10),
+                    **conn_params)
+            return _pools[self.alias]
+
+    def get_new_connection(self, conn_params):
+        connections = self.get_pool(conn_params)
+        connection = connections.getconn()
+        if self.settings_dict['OPTIONS'].get('pool_health_check', True):
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                connection.rollback()
+            except base.Database.Error:
+                connections.putconn(connection, close=True)
+                connection = connections.getconn()
+
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                _pools[self.alias].putconn(
+                    self.connection, close=bool(self.connection.closed))
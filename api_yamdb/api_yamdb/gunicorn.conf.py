@@ -0,0 +1,35 @@
+import glob
+import multiprocessing
+import os
+import tempfile
+
+bind = os.getenv('GUNICORN_BIND', default='0:8000')
+workers = int(os.getenv(
+    'GUNICORN_WORKERS', default=multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', default=1))
+# wsgi — воркеры sync или gthread, asgi — воркеры uvicorn (api_yamdb.asgi),
+# приложение выбирается по тому же GUNICORN_PROFILE в Dockerfile
+profile = os.getenv('GUNICORN_PROFILE', default='wsgi')
+if profile == 'asgi':
+    default_worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    default_worker_class = 'gthread' if threads > 1 else 'sync'
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', default=default_worker_class)
+timeout = int(os.getenv('GUNICORN_TIMEOUT', default=30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', default=5))
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', default=0))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', default=0))
+
+
+def on_starting(server):
+    # Воркеры складывают метрики через общий каталог; файлы прошлого
+    # запуска удаляются, чтобы счётчики начинались с нуля
+    metrics_dir = os.environ.setdefault(
+        'API_METRICS_DIR',
+        os.path.join(tempfile.gettempdir(), 'yamdb_metrics'))
+    os.makedirs(metrics_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(metrics_dir, '*.json')):
+        os.remove(path)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+    from api.cache import check_shared_cache
+    check_shared_cache(server.cfg.workers)
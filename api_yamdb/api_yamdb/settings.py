@@ -24,6 +24,7 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = 'reviews.User'
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -33,13 +34,42 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# True — пользователь восстанавливается из токена без запроса к БД
+JWT_STATELESS = os.getenv('JWT_STATELESS', default='False') == 'True'
+# False — JSON ответов и запросов через json вместо orjson
+API_FAST_JSON = os.getenv('API_FAST_JSON', default='True') == 'True'
+# Как долго процесс помнит версию токенов пользователя, в секундах
+JWT_REVOCATION_TTL = int(os.getenv('JWT_REVOCATION_TTL', default=5))
+# Версии токенов скольких пользователей процесс держит в памяти
+JWT_REVOCATION_CACHE_SIZE = int(
+    os.getenv('JWT_REVOCATION_CACHE_SIZE', default=10000))
+# Сколько секунд процесс помнит имя автора по id и сколько имён хранит
+API_USERNAME_CACHE_TTL = int(
+    os.getenv('API_USERNAME_CACHE_TTL', default=60))
+API_USERNAME_CACHE_SIZE = int(
+    os.getenv('API_USERNAME_CACHE_SIZE', default=10000))
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication' if JWT_STATELESS
+        else 'rest_framework_simplejwt.authentication.JWTAuthentication',
+    ],
+
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer' if API_FAST_JSON
+        else 'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.FastJSONParser' if API_FAST_JSON
+        else 'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
 
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
@@ -49,6 +79,31 @@ REST_FRAMEWORK = {
     )
 }
 
+# page — номера страниц, cursor — курсор по (pub_date, id) или id
+API_PAGINATION = os.getenv('API_PAGINATION', default='page')
+# False — страницы без COUNT(*) и поля count в ответе
+API_PAGINATION_COUNT = os.getenv(
+    'API_PAGINATION_COUNT', default='True') == 'True'
+
+# False — списки произведений, отзывов и комментариев сериализуются DRF,
+# а не читаются через values()
+API_VALUES_LIST = os.getenv('API_VALUES_LIST', default='True') == 'True'
+
+# Наибольшее число объектов в пакетном запросе /bulk/
+API_BULK_MAX_ITEMS = int(os.getenv('API_BULK_MAX_ITEMS', default=1000))
+
+# Метрики ответов по маршрутам на /api/v1/metrics/, False — выключены
+API_METRICS = os.getenv('API_METRICS', default='True') == 'True'
+# Доля ответов, для которых считаются запросы к БД и время сериализации
+API_METRICS_SAMPLE_RATE = float(
+    os.getenv('API_METRICS_SAMPLE_RATE', default=0.1))
+# Каталог, через который метрики воркеров gunicorn складываются в общие
+# (задаётся в gunicorn.conf.py); пусто — метрики только этого процесса
+API_METRICS_DIR = os.getenv('API_METRICS_DIR', default='')
+# Как часто процесс записывает свои метрики в API_METRICS_DIR, в секундах
+API_METRICS_FLUSH_INTERVAL = float(
+    os.getenv('API_METRICS_FLUSH_INTERVAL', default=1))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=30),
     'AUTH_HEADER_TYPES': ('Bearer',),
@@ -86,10 +141,40 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER', default='postgres'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='postgres'),
         'HOST': os.getenv('DB_HOST', default='db'),
-        'PORT': os.getenv('DB_PORT', default='5432')
+        'PORT': os.getenv('DB_PORT', default='5432'),
+        # Сколько секунд держать соединение между запросами, 0 — закрывать
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=60)),
+        'OPTIONS': {},
     }
 }
 
+# Для ENGINE=api_yamdb.db.postgresql_pool — пул соединений в процессе
+if DATABASES['default']['ENGINE'] == 'api_yamdb.db.postgresql_pool':
+    DATABASES['default']['OPTIONS'].update({
+        'pool_min_size': int(os.getenv('DB_POOL_MIN_SIZE', default=1)),
+        'pool_max_size': int(os.getenv('DB_POOL_MAX_SIZE', default=10)),
+    })
+
+# Проверять постоянные соединения перед каждым запросом
+DB_CONN_HEALTH_CHECKS = os.getenv(
+    'DB_CONN_HEALTH_CHECKS', default='True') == 'True'
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='yamdb'),
+    }
+}
+
+API_CACHE_ALIAS = 'default'
+# Время жизни закэшированных ответов каталога, 0 — кэш выключен
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', default=300))
+# Как долго процесс держит справочник категорий и жанров, если отметки
+# изменения в кэше не общие для воркеров (LocMemCache), в секундах
+API_CATALOGUE_TTL = int(os.getenv('API_CATALOGUE_TTL', default=60))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -36,3 +36,13 @@ admin.site.register(models.Title, TitleAdmin)
 admin.site.register(models.Genre, GenreAdmin)
 admin.site.register(models.Review, ReviewAdmin)
 admin.site.register(models.Comment, CommentAdmin)
+
+
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ('recipient', 'subject', 'status', 'attempts', 'created',
+                    'sent_at')
+    list_filter = ('status',)
+    search_fields = ('recipient',)
+
+
+admin.site.register(models.OutgoingEmail, OutgoingEmailAdmin)
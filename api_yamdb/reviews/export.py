@@ -0,0 +1,117 @@
+import csv
+import datetime
+import json
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Comment, Review, Title
+
+# Колонки выгрузки и поля, из которых они берутся. Названия колонок те же,
+# что читает import_catalogue
+EXPORTS = {
+    'titles': (Title, {
+        'id': 'id', 'name': 'name', 'year': 'year',
+        'description': 'description', 'category': 'category__slug',
+        'rating': 'rating', 'reviews_count': 'reviews_count'}),
+    'reviews': (Review, {
+        'id': 'id', 'title_id': 'title_id', 'author': 'author__username',
+        'text': 'text', 'score': 'score', 'pub_date': 'pub_date'}),
+    'comments': (Comment, {
+        'id': 'id', 'review_id': 'review_id', 'title_id': 'review__title_id',
+        'author': 'author__username', 'text': 'text',
+        'pub_date': 'pub_date'}),
+}
+FORMATS = ('ndjson', 'csv')
+
+
+class Echo:
+    """
+    Буфер для csv.writer, который сразу отдаёт записанную строку
+    """
+
+    def write(self, value):
+        return value
+
+
+def parse_since(value):
+    """
+    Момент времени из ISO 8601 (дата или дата со временем), None — ошибка
+    """
+    since = parse_datetime(value)
+    if since is None:
+        date = parse_date(value)
+        if date is None:
+            return None
+        since = datetime.datetime.combine(date, datetime.time())
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since, timezone.utc)
+    return since
+
+
+def get_columns(kind):
+    columns = list(EXPORTS[kind][1])
+    if kind == 'titles':
+        columns.append('genre')
+    return columns
+
+
+def export_rows(kind, since=None, chunk_size=2000):
+    """
+    Строки выгрузки в виде словарей. Читает таблицу серверным курсором
+    пачками по chunk_size; since отбирает записи с pub_date не раньше
+    указанного момента
+    """
+    model, columns = EXPORTS[kind]
+    queryset = model.objects.order_by('pk').values_list(*columns.values())
+    if since is not None:
+        if kind == 'titles':
+            raise ValueError('У произведений нет даты для выгрузки с since')
+        queryset = queryset.filter(pub_date__gte=since)
+    rows = queryset.iterator(chunk_size=chunk_size)
+    while True:
+        chunk = [dict(zip(columns, row))
+                 for row in islice(rows, chunk_size)]
+        if not chunk:
+            return
+        if kind == 'titles':
+            genres = {row['id']: [] for row in chunk}
+            through = Title.genre.through.objects.filter(
+                title_id__in=list(genres)
+            ).order_by('title_id', 'genre__slug').values_list(
+                'title_id', 'genre__slug')
+            for title_id, slug in through:
+                genres[title_id].append(slug)
+            for row in chunk:
+                row['genre'] = genres[row['id']]
+        yield from chunk
+
+
+def render_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False)
+        yield '\n'
+
+
+def to_csv_value(value, encoder=DjangoJSONEncoder()):
+    if isinstance(value, list):
+        return ','.join(value)
+    if isinstance(value, datetime.datetime):
+        return encoder.default(value)
+    return value
+
+
+def render_csv(rows, columns):
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(
+            [to_csv_value(row[column]) for column in columns])
+
+
+def render(kind, output, rows):
+    if output == 'csv':
+        return render_csv(rows, get_columns(kind))
+    return render_ndjson(rows)
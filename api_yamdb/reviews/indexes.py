@@ -0,0 +1,19 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.db.models import Index
+
+
+class TrigramIndex(GinIndex):
+    """
+    GIN-индекс с gin_trgm_ops для поиска по подстроке (LIKE '%...%').
+    На других СУБД, например SQLite для разработки, вместо него
+    создаётся обычный индекс
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('opclasses', ['gin_trgm_ops'])
+        super().__init__(**kwargs)
+
+    def create_sql(self, model, schema_editor, using=''):
+        if schema_editor.connection.vendor != 'postgresql':
+            return Index.create_sql(self, model, schema_editor, using)
+        return super().create_sql(model, schema_editor, using)
@@ -0,0 +1,110 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Avg, Count
+from django.utils import timezone
+
+from .models import Category, Genre, Review, Title, TitleRanking
+from .signals import leaderboards_refreshed
+
+TOP = 'top'
+TRENDING = 'trending'
+KINDS = (TOP, TRENDING)
+
+
+def board_key(kind, category=None, genre=None):
+    """
+    Ключ рейтинга: top, top:category:<slug>, top:genre:<slug>, trending
+    """
+    if category:
+        return f'{kind}:category:{category}'
+    if genre:
+        return f'{kind}:genre:{genre}'
+    return kind
+
+
+def top_rated(titles, limit, min_reviews):
+    """
+    Лучшие по рейтингу. Произведения без оценок в рейтинг не попадают
+    даже при min_reviews=0: у них нет rating
+    """
+    return list(titles.filter(
+        reviews_count__gte=min_reviews, rating__isnull=False,
+    ).order_by('-rating', '-reviews_count', 'id').values_list(
+        'id', 'rating')[:limit])
+
+
+def trending(limit, days):
+    """
+    Произведения с наибольшим числом отзывов за последние days дней
+    """
+    since = timezone.now() - timedelta(days=days)
+    return list(Review.objects.filter(
+        pub_date__gte=since, title__isnull=False,
+    ).order_by().values('title').annotate(
+        n=Count('pk'), avg=Avg('score'),
+    ).order_by('-n', '-avg', 'title').values_list('title', 'n')[:limit])
+
+
+def compute_boards(kinds, limit, min_reviews, days):
+    boards = {}
+    if TOP in kinds:
+        titles = Title.objects.all()
+        boards[board_key(TOP)] = top_rated(titles, limit, min_reviews)
+        for slug in Category.objects.values_list('slug', flat=True):
+            boards[board_key(TOP, category=slug)] = top_rated(
+                titles.filter(category__slug=slug), limit, min_reviews)
+        for slug in Genre.objects.values_list('slug', flat=True):
+            boards[board_key(TOP, genre=slug)] = top_rated(
+                titles.filter(genre__slug=slug), limit, min_reviews)
+    if TRENDING in kinds:
+        boards[board_key(TRENDING)] = trending(limit, days)
+    return boards
+
+
+def store_board(board, ranking):
+    """
+    Записывает рейтинг, меняя только места, которые сдвинулись.
+    Возвращает число изменённых строк
+    """
+    stored = {
+        row.position: row
+        for row in TitleRanking.objects.filter(board=board)
+    }
+    changed, created = [], []
+    for position, (title_id, score) in enumerate(ranking, start=1):
+        row = stored.pop(position, None)
+        if row is None:
+            created.append(TitleRanking(
+                board=board, position=position,
+                title_id=title_id, score=score))
+        elif (row.title_id, row.score) != (title_id, score):
+            row.title_id, row.score = title_id, score
+            changed.append(row)
+    TitleRanking.objects.bulk_update(
+        changed, ['title', 'score'], batch_size=1000)
+    TitleRanking.objects.bulk_create(created)
+    if stored:
+        TitleRanking.objects.filter(pk__in=[
+            row.pk for row in stored.values()]).delete()
+    return len(changed) + len(created) + len(stored)
+
+
+def refresh_leaderboards(kinds=KINDS, limit=100, min_reviews=1, days=7):
+    """
+    Пересчитывает рейтинги kinds и удаляет рейтинги исчезнувших
+    категорий и жанров. Возвращает число изменённых строк
+    """
+    boards = compute_boards(kinds, limit, min_reviews, days)
+    changed = 0
+    with transaction.atomic():
+        for board, ranking in boards.items():
+            changed += store_board(board, ranking)
+        for kind in kinds:
+            stale = TitleRanking.objects.filter(
+                board__startswith=f'{kind}:'
+            ).exclude(board__in=list(boards))
+            changed += stale.delete()[0]
+    if changed:
+        leaderboards_refreshed.send(sender=TitleRanking)
+    return changed
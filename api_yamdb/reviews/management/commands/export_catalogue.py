@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from reviews.export import EXPORTS, FORMATS, export_rows, parse_since, render
+
+
+class Command(BaseCommand):
+    help = 'Выгружает произведения, отзывы или комментарии в NDJSON или CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORTS))
+        parser.add_argument('--output', choices=FORMATS, default='ndjson')
+        parser.add_argument(
+            '--since', help='Только записи с pub_date не раньше (ISO 8601)')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument(
+            '--file', help='Файл для выгрузки (по умолчанию stdout)')
+
+    def handle(self, *args, **options):
+        since = options['since']
+        if since is not None:
+            since = parse_since(since)
+            if since is None:
+                raise CommandError('Некорректная дата в --since')
+        rows = export_rows(options['kind'], since, options['chunk_size'])
+        parts = render(options['kind'], options['output'], rows)
+        try:
+            if options['file']:
+                with open(options['file'], 'w', encoding='utf-8',
+                          newline='') as target:
+                    target.writelines(parts)
+            else:
+                for part in parts:
+                    self.stdout.write(part, ending='')
+        except ValueError as error:
+            raise CommandError(error)
@@ -0,0 +1,328 @@
+import csv
+import io
+import json
+import os
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from reviews.models import (SCORES, Category, Comment, Genre, Review, Title,
+                            User)
+from reviews.signals import catalogue_changed
+
+GenreTitle = Title.genre.through
+
+# Порядок загрузки: каждый файл ссылается только на уже загруженные
+SOURCES = (
+    ('category', Category),
+    ('genre', Genre),
+    ('users', User),
+    ('titles', Title),
+    ('genre_title', GenreTitle),
+    ('review', Review),
+    ('comments', Comment),
+)
+DEFERRED_INDEXES = (
+    (Title, 'title_name_trgm_idx'),
+    (Review, 'review_title_pub_date_idx'),
+    (Comment, 'comment_review_pub_date_idx'),
+)
+
+
+def read_rows(path):
+    with open(path, encoding='utf-8', newline='') as source:
+        if path.endswith('.jsonl'):
+            for line in source:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(source)
+
+
+def chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def copy_value(value):
+    """
+    Значение в текстовом формате COPY
+    """
+    if value is None:
+        return '\\N'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def parse_date(value):
+    if not value:
+        return timezone.now()
+    date = parse_datetime(value)
+    if date is None:
+        raise ValueError(f'некорректная дата {value!r}')
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date, timezone.utc)
+    return date
+
+
+@contextmanager
+def keep_auto_now_add(model):
+    """
+    bulk_create заполняет auto_now_add текущим временем;
+    на время загрузки даты берутся из файла
+    """
+    fields = [field for field in model._meta.concrete_fields
+              if getattr(field, 'auto_now_add', False)]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = ('Загружает каталог из CSV или JSONL: category, genre, users, '
+            'titles, genre_title, review, comments')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Каталог с файлами <имя>.csv или <имя>.jsonl')
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Строк в одной вставке')
+        parser.add_argument(
+            '--method', choices=('bulk', 'copy'), default='bulk',
+            help='bulk_create или COPY (только PostgreSQL)')
+        parser.add_argument(
+            '--defer-indexes', action='store_true',
+            help='Удалить вторичные индексы на время загрузки '
+                 '(только PostgreSQL)')
+
+    def handle(self, *args, **options):
+        postgresql = connection.vendor == 'postgresql'
+        if not postgresql and (
+                options['method'] == 'copy' or options['defer_indexes']):
+            raise CommandError(
+                '--method=copy и --defer-indexes требуют PostgreSQL')
+        self.options = options
+        self.maps = {}
+        started = time.monotonic()
+        total = 0
+        # Одна транзакция: при ошибке в любом файле база остаётся прежней
+        with transaction.atomic():
+            if options['defer_indexes']:
+                self.drop_indexes()
+            for name, model in SOURCES:
+                path = self.find_source(options['path'], name)
+                if path is not None:
+                    total += self.load(path, model)
+            if options['defer_indexes']:
+                self.create_indexes()
+            Title.objects.rebuild_ratings()
+        self.finish()
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Всего: {total} строк за {elapsed:.1f} с '
+            f'({total / max(elapsed, 1e-6):.0f} строк/с)'))
+
+    def find_source(self, directory, name):
+        for extension in ('jsonl', 'csv'):
+            path = os.path.join(directory, f'{name}.{extension}')
+            if os.path.exists(path):
+                return path
+        return None
+
+    def load(self, path, model):
+        started = time.monotonic()
+        build = getattr(self, f'build_{model._meta.model_name}')
+        count = 0
+        rows = enumerate(read_rows(path), start=2)
+        with keep_auto_now_add(model):
+            for chunk in chunks(rows, self.options['batch_size']):
+                objs = []
+                for line, row in chunk:
+                    try:
+                        objs.append(build(row))
+                    except (KeyError, ValueError) as error:
+                        raise CommandError(f'{path}:{line}: {error}')
+                self.insert(model, objs)
+                if model is Title:
+                    self.insert(GenreTitle, [
+                        GenreTitle(title_id=title.pk, genre_id=genre_id)
+                        for title in objs
+                        for genre_id in getattr(title, '_genre_ids', ())])
+                count += len(objs)
+            self.reset_sequence(model)
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'{os.path.basename(path)}: {count} строк за {elapsed:.1f} с '
+            f'({count / max(elapsed, 1e-6):.0f} строк/с)')
+        return count
+
+    def insert(self, model, objs):
+        if self.options['method'] == 'bulk':
+            model.objects.bulk_create(objs, self.options['batch_size'])
+            return
+        with_pk = [obj for obj in objs if obj.pk is not None]
+        without_pk = [obj for obj in objs if obj.pk is None]
+        for group in (with_pk, without_pk):
+            if group:
+                self.copy(model, group)
+
+    def copy(self, model, objs):
+        fields = [
+            field for field in model._meta.concrete_fields
+            if not (field.primary_key and objs[0].pk is None)
+        ]
+        buffer = io.StringIO()
+        for obj in objs:
+            buffer.write('\t'.join(
+                copy_value(field.get_db_prep_save(
+                    getattr(obj, field.attname), connection))
+                for field in fields
+            ))
+            buffer.write('\n')
+        buffer.seek(0)
+        columns = ', '.join(
+            connection.ops.quote_name(field.column) for field in fields)
+        table = connection.ops.quote_name(model._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.cursor.copy_expert(
+                f'COPY {table} ({columns}) FROM STDIN',
+                buffer)
+
+    def reset_sequence(self, model):
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [model]):
+                cursor.execute(sql)
+
+    def reference(self, row, name, model, field):
+        """
+        Ссылка на model из колонки <name>_id (id) или <name> (slug или
+        username, даже если он из одних цифр)
+        """
+        value = row.get(f'{name}_id')
+        if value not in (None, ''):
+            return int(value)
+        return self.resolve(model, field, row[name])
+
+    def resolve(self, model, field, value):
+        """
+        Поиск id по slug/username через словарь в памяти
+        """
+        value = str(value).strip()
+        if model not in self.maps:
+            self.maps[model] = dict(
+                model.objects.values_list(field, 'pk').iterator())
+        try:
+            return self.maps[model][value]
+        except KeyError:
+            raise ValueError(f'{model.__name__} {value!r} не найден')
+
+    def finish(self):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                for _, model in SOURCES:
+                    cursor.execute(f'ANALYZE {model._meta.db_table}')
+        catalogue_changed.send(sender=self.__class__)
+
+    def drop_indexes(self):
+        with connection.schema_editor() as editor:
+            for model, name in DEFERRED_INDEXES:
+                editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+    def create_indexes(self):
+        with connection.schema_editor() as editor:
+            for model, name in DEFERRED_INDEXES:
+                index = next(
+                    index for index in model._meta.indexes
+                    if index.name == name)
+                editor.add_index(model, index)
+
+    @staticmethod
+    def get_pk(row):
+        return int(row['id']) if row.get('id') else None
+
+    def build_category(self, row):
+        return Category(
+            pk=self.get_pk(row), name=row['name'], slug=row['slug'])
+
+    def build_genre(self, row):
+        return Genre(pk=self.get_pk(row), name=row['name'], slug=row['slug'])
+
+    def build_user(self, row):
+        return User(
+            pk=self.get_pk(row),
+            username=row['username'],
+            email=row.get('email', ''),
+            role=row.get('role') or User.USER,
+            bio=row.get('bio', ''),
+            first_name=row.get('first_name', ''),
+            last_name=row.get('last_name', ''),
+            password=make_password(None),
+        )
+
+    def build_title(self, row):
+        """
+        Колонка genre (список slug, в CSV — через запятую, как
+        в export_catalogue) заменяет отдельный файл genre_title
+        """
+        title = Title(
+            pk=self.get_pk(row),
+            name=row['name'],
+            year=int(row['year']),
+            description=row.get('description', ''),
+            category_id=(
+                self.reference(row, 'category', Category, 'slug')
+                if row.get('category_id') or row.get('category') else None),
+        )
+        genres = row.get('genre')
+        if genres:
+            if title.pk is None:
+                raise ValueError('для колонки genre нужен id')
+            if isinstance(genres, str):
+                genres = genres.split(',')
+            title._genre_ids = [
+                self.resolve(Genre, 'slug', slug) for slug in genres]
+        return title
+
+    def build_title_genre(self, row):
+        return GenreTitle(
+            title_id=int(row.get('title_id') or row['title']),
+            genre_id=self.reference(row, 'genre', Genre, 'slug'),
+        )
+
+    def build_review(self, row):
+        score = int(row['score'])
+        if score not in SCORES:
+            raise ValueError(
+                f'оценка {score} вне диапазона {SCORES[0]}–{SCORES[-1]}')
+        return Review(
+            pk=self.get_pk(row),
+            title_id=int(row.get('title_id') or row['title']),
+            author_id=self.reference(row, 'author', User, 'username'),
+            text=row['text'],
+            score=score,
+            pub_date=parse_date(row.get('pub_date')),
+        )
+
+    def build_comment(self, row):
+        return Comment(
+            pk=self.get_pk(row),
+            review_id=int(row.get('review_id') or row['review']),
+            author_id=self.reference(row, 'author', User, 'username'),
+            text=row['text'],
+            pub_date=parse_date(row.get('pub_date')),
+        )
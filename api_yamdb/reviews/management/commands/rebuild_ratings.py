@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from reviews.models import Title
+from reviews.signals import catalogue_changed
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рейтинг и счётчики отзывов произведений'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'title_ids', nargs='*', type=int,
+            help='id произведений (по умолчанию — все)')
+
+    def handle(self, *args, **options):
+        titles = Title.objects.all()
+        if options['title_ids']:
+            titles = titles.filter(pk__in=options['title_ids'])
+        with transaction.atomic():
+            updated = titles.rebuild_ratings()
+        catalogue_changed.send(sender=self.__class__)
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитано произведений: {updated}'))
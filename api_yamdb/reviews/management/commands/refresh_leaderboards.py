@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+from reviews.leaderboards import KINDS, refresh_leaderboards
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает рейтинги лучших произведений (всего, по '
+            'категориям и жанрам) и популярных за последние дни')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind', action='append', choices=KINDS, dest='kinds',
+            help='Какие рейтинги пересчитать (по умолчанию — все)')
+        parser.add_argument(
+            '--limit', type=int, default=100,
+            help='Мест в каждом рейтинге')
+        parser.add_argument(
+            '--min-reviews', type=int, default=1,
+            help='Минимум отзывов для попадания в рейтинг лучших')
+        parser.add_argument(
+            '--days', type=int, default=7,
+            help='Окно популярности по дате отзыва, в днях')
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Не завершаться, а пересчитывать по расписанию')
+        parser.add_argument(
+            '--interval', type=float, default=300,
+            help='Пауза между пересчётами в режиме --loop, в секундах')
+
+    def handle(self, *args, **options):
+        while True:
+            changed = refresh_leaderboards(
+                kinds=options['kinds'] or KINDS,
+                limit=options['limit'],
+                min_reviews=options['min_reviews'],
+                days=options['days'],
+            )
+            self.stdout.write(f'Изменено мест в рейтингах: {changed}')
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
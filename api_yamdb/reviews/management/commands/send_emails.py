@@ -0,0 +1,102 @@
+import time
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from reviews.models import OutgoingEmail
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди пачками через одно соединение'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Писем за одну транзакцию')
+        parser.add_argument(
+            '--max-attempts', type=int, default=5,
+            help='Попыток до пометки письма как неотправленного')
+        parser.add_argument(
+            '--backoff', type=int, default=60,
+            help='Пауза перед первой повторной попыткой, в секундах; '
+                 'каждая следующая вдвое длиннее')
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Не завершаться, а ждать новые письма')
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Пауза между проверками очереди в режиме --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            sent = failed = 0
+            while True:
+                batch_sent, batch_failed = self.send_batch(options)
+                if not batch_sent + batch_failed:
+                    break
+                sent += batch_sent
+                failed += batch_failed
+            if sent or failed or not options['loop']:
+                self.stdout.write(
+                    f'Отправлено: {sent}, с ошибкой: {failed}')
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
+
+    def send_batch(self, options):
+        now = timezone.now()
+        with transaction.atomic():
+            messages = list(
+                OutgoingEmail.objects.select_for_update(
+                    skip_locked=True
+                ).filter(
+                    status=OutgoingEmail.PENDING, next_attempt_at__lte=now
+                ).order_by('next_attempt_at')[:options['batch_size']]
+            )
+            if not messages:
+                return 0, 0
+            sent = failed = 0
+            connection = get_connection()
+            try:
+                connection.open()
+            except Exception as error:
+                for message in messages:
+                    self.fail(message, error, now, options)
+                failed = len(messages)
+            else:
+                try:
+                    for message in messages:
+                        try:
+                            EmailMessage(
+                                subject=message.subject,
+                                body=message.message,
+                                from_email=message.from_email,
+                                to=[message.recipient],
+                                connection=connection,
+                            ).send()
+                        except Exception as error:
+                            self.fail(message, error, now, options)
+                            failed += 1
+                        else:
+                            message.status = OutgoingEmail.SENT
+                            message.sent_at = timezone.now()
+                            message.attempts += 1
+                            sent += 1
+                finally:
+                    connection.close()
+            OutgoingEmail.objects.bulk_update(
+                messages,
+                ['status', 'attempts', 'next_attempt_at', 'last_error',
+                 'sent_at'])
+        return sent, failed
+
+    def fail(self, message, error, now, options):
+        message.attempts += 1
+        message.last_error = str(error)
+        if message.attempts >= options['max_attempts']:
+            message.status = OutgoingEmail.FAILED
+        else:
+            message.next_attempt_at = now + timedelta(
+                seconds=options['backoff'] * 2 ** (message.attempts - 1))
@@ -0,0 +1,21 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+import reviews.indexes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0015_pub_date_keyset_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='title',
+            index=reviews.indexes.TrigramIndex(
+                fields=['name'], name='title_name_trgm_idx',
+                opclasses=['gin_trgm_ops']),
+        ),
+    ]
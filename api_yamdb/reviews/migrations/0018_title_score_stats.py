@@ -0,0 +1,51 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count
+
+
+def fill_score_stats(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    TitleScoreStats = apps.get_model('reviews', 'TitleScoreStats')
+    counts = {}
+    rows = Review.objects.filter(
+        title__isnull=False
+    ).order_by().values('title', 'score').annotate(n=Count('pk'))
+    for row in rows:
+        counts.setdefault(row['title'], {})[
+            f'score_{row["score"]}'] = row['n']
+    TitleScoreStats.objects.bulk_create(
+        (TitleScoreStats(title_id=pk, **scores)
+         for pk, scores in counts.items()))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0017_outgoing_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleScoreStats',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='score_stats', serialize=False, to='reviews.Title', verbose_name='Произведение')),
+                ('score_1', models.PositiveIntegerField(default=0)),
+                ('score_2', models.PositiveIntegerField(default=0)),
+                ('score_3', models.PositiveIntegerField(default=0)),
+                ('score_4', models.PositiveIntegerField(default=0)),
+                ('score_5', models.PositiveIntegerField(default=0)),
+                ('score_6', models.PositiveIntegerField(default=0)),
+                ('score_7', models.PositiveIntegerField(default=0)),
+                ('score_8', models.PositiveIntegerField(default=0)),
+                ('score_9', models.PositiveIntegerField(default=0)),
+                ('score_10', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Статистика оценок',
+                'verbose_name_plural': 'Статистика оценок',
+            },
+        ),
+        migrations.RunPython(fill_score_stats, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,12 @@
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import (Avg, Case, Count, F, FloatField, IntegerField,
+                              OuterRef, Subquery, Sum, Value, When)
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
 
+from .indexes import TrigramIndex
 from .validators import year_validator
 
 
@@ -10,6 +15,7 @@ class User(AbstractUser):
     MODERATOR = 'moderator'
     ADMIN = 'admin'
     USER_ROLE = ((USER, 'User'), (MODERATOR, 'moderator'), (ADMIN, 'admin'))
+    TOKEN_CLAIMS = ('username', 'role', 'is_superuser', 'is_active')
     bio = models.TextField(
         verbose_name='Биография',
         blank=True,
@@ -27,6 +33,12 @@ class User(AbstractUser):
         max_length=100,
         blank=True
     )
+    # Растёт при отзыве токенов: токены со старой версией отклоняются
+    token_version = models.PositiveIntegerField(
+        verbose_name='Версия токенов',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         constraints = [
@@ -38,6 +50,39 @@ class User(AbstractUser):
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if not set(cls.TOKEN_CLAIMS) & instance.get_deferred_fields():
+            instance._loaded_claims = instance.token_claims
+        return instance
+
+    @property
+    def token_claims(self):
+        """
+        Поля, которые попадают в токен: их изменение отзывает токены
+        """
+        return tuple(getattr(self, field) for field in self.TOKEN_CLAIMS)
+
+    def save(self, *args, **kwargs):
+        if (not self._state.adding and not args
+                and kwargs.get('update_fields') is None
+                and not kwargs.get('force_insert')):
+            # token_version меняет только revoke_tokens: сохранение ранее
+            # загруженного пользователя не должно её откатить
+            kwargs['update_fields'] = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'token_version'
+                and field.attname not in self.get_deferred_fields()]
+        if (self.pk is not None and not self._state.adding
+                and not hasattr(self, '_loaded_claims')):
+            # Пользователь загружен без полей токена: прежние значения
+            # нужны, чтобы решить, отзывать ли токены
+            self._loaded_claims = User.objects.filter(
+                pk=self.pk).values_list(*self.TOKEN_CLAIMS).first()
+        super().save(*args, **kwargs)
+        self._loaded_claims = self.token_claims
+
 
 class Category(models.Model):
     name = models.CharField(
@@ -64,6 +109,47 @@ class Genre(models.Model):
         return self.slug
 
 
+class TitleQuerySet(models.QuerySet):
+
+    def apply_scores(self, count, score_sum):
+        """
+        Атомарно сдвигает счётчики отзывов и пересчитывает рейтинг
+        """
+        new_count = F('reviews_count') + count
+        new_sum = F('score_sum') + score_sum
+        return self.update(
+            reviews_count=new_count,
+            score_sum=new_sum,
+            rating=Case(
+                When(reviews_count=-count, then=Value(None)),
+                default=Cast(new_sum, FloatField()) / new_count,
+                output_field=FloatField(),
+            ),
+        )
+
+    def rebuild_ratings(self):
+        """
+        Пересчитывает рейтинг и гистограмму оценок по таблице отзывов
+        """
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        updated = self.update(
+            reviews_count=Coalesce(
+                Subquery(reviews.annotate(c=Count('pk')).values('c'),
+                         output_field=IntegerField()),
+                0),
+            score_sum=Coalesce(
+                Subquery(reviews.annotate(s=Sum('score')).values('s'),
+                         output_field=IntegerField()),
+                0),
+            rating=Subquery(reviews.annotate(a=Avg('score')).values('a'),
+                            output_field=FloatField()),
+        )
+        TitleScoreStats.objects.rebuild(self)
+        return updated
+
+
 class Title(models.Model):
     name = models.TextField(
         max_length=50, db_index=True, verbose_name='Наименование произведения')
@@ -81,12 +167,161 @@ class Title(models.Model):
         blank=True,
         verbose_name='Категория произведения'
     )
+    rating = models.FloatField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Рейтинг произведения')
+    reviews_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество отзывов')
+    score_sum = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Сумма оценок')
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
+        indexes = [
+            # name__contains в TitlesFilter
+            TrigramIndex(fields=['name'], name='title_name_trgm_idx'),
+        ]
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
 
 
+SCORES = range(1, 11)
+
+
+class TitleScoreStatsQuerySet(models.QuerySet):
+
+    def count_scores(self, titles):
+        """
+        Считает оценки произведений по таблице отзывов
+        """
+        counts = {}
+        rows = Review.objects.filter(
+            title__in=titles
+        ).order_by().values('title', 'score').annotate(n=Count('pk'))
+        for row in rows:
+            counts.setdefault(row['title'], {})[
+                f'score_{row["score"]}'] = row['n']
+        return counts
+
+    def apply_score(self, title_id, score, delta):
+        """
+        Сдвигает счётчик оценки score произведения на delta. Строка
+        создаётся при первой новой оценке и заполняется по таблице отзывов
+        """
+        field = f'score_{score}'
+        stats = self.filter(title_id=title_id)
+        if stats.update(**{field: F(field) + delta}) or delta < 0:
+            return
+        _, created = self.get_or_create(
+            title_id=title_id,
+            defaults=self.count_scores([title_id]).get(title_id, {}))
+        if not created:
+            stats.update(**{field: F(field) + delta})
+
+    def rebuild(self, titles):
+        """
+        Пересчитывает гистограммы оценок произведений titles
+        """
+        counts = self.count_scores(titles)
+        self.filter(title__in=titles).delete()
+        self.bulk_create(
+            (self.model(title_id=pk, **scores)
+             for pk, scores in counts.items()))
+
+
+class TitleScoreStats(models.Model):
+    """
+    Число оценок каждого значения от 1 до 10 по произведению
+    """
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='score_stats',
+        verbose_name='Произведение')
+    score_1 = models.PositiveIntegerField(default=0)
+    score_2 = models.PositiveIntegerField(default=0)
+    score_3 = models.PositiveIntegerField(default=0)
+    score_4 = models.PositiveIntegerField(default=0)
+    score_5 = models.PositiveIntegerField(default=0)
+    score_6 = models.PositiveIntegerField(default=0)
+    score_7 = models.PositiveIntegerField(default=0)
+    score_8 = models.PositiveIntegerField(default=0)
+    score_9 = models.PositiveIntegerField(default=0)
+    score_10 = models.PositiveIntegerField(default=0)
+
+    objects = TitleScoreStatsQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Статистика оценок'
+        verbose_name_plural = 'Статистика оценок'
+
+    @property
+    def histogram(self):
+        return {score: getattr(self, f'score_{score}') for score in SCORES}
+
+    @property
+    def count(self):
+        return sum(self.histogram.values())
+
+    @property
+    def mean(self):
+        count = self.count
+        if not count:
+            return None
+        total = sum(score * n for score, n in self.histogram.items())
+        return round(total / count, 2)
+
+    @property
+    def median(self):
+        count = self.count
+        if not count:
+            return None
+        middle = ((count - 1) // 2, count // 2)
+        values = []
+        seen = 0
+        for score, n in self.histogram.items():
+            values.extend(
+                score for position in middle if seen <= position < seen + n)
+            seen += n
+        return sum(values) / 2
+
+
+class TitleRanking(models.Model):
+    """
+    Место произведения в рейтинге board. Таблица заполняется командой
+    refresh_leaderboards
+    """
+    board = models.CharField(max_length=150, verbose_name='Рейтинг')
+    position = models.PositiveIntegerField(verbose_name='Место')
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='rankings',
+        verbose_name='Произведение')
+    score = models.FloatField(verbose_name='Показатель')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['board', 'position'],
+                name='unique_board_position'),
+        ]
+        ordering = ('board', 'position')
+        verbose_name = 'Место в рейтинге'
+        verbose_name_plural = 'Места в рейтингах'
+
+    def __str__(self):
+        return f'{self.board} #{self.position}'
+
+
 class Review(models.Model):
     title = models.ForeignKey(
         Title,
@@ -118,6 +353,11 @@ class Review(models.Model):
                 fields=['author', 'title'],
                 name='single_review_per_user'),
         ]
+        indexes = [
+            models.Index(
+                fields=['title', 'pub_date', 'id'],
+                name='review_title_pub_date_idx'),
+        ]
         ordering = ('pub_date',)
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
@@ -125,6 +365,23 @@ class Review(models.Model):
     def __str__(self):
         return self.text
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if not {'title_id', 'score'} & instance.get_deferred_fields():
+            instance._loaded_score = (instance.title_id, instance.score)
+        return instance
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            if self.pk is not None and not hasattr(self, '_loaded_score'):
+                # Отзыв загружен без title_id или score: прежние значения
+                # нужны, чтобы поправить счётчики старого произведения
+                self._loaded_score = Review.objects.filter(
+                    pk=self.pk).values_list('title_id', 'score').first()
+            super().save(*args, **kwargs)
+        self._loaded_score = (self.title_id, self.score)
+
 
 class Comment(models.Model):
     review = models.ForeignKey(
@@ -145,9 +402,51 @@ class Comment(models.Model):
         auto_now_add=True)
 
     class Meta:
+        indexes = [
+            models.Index(
+                fields=['review', 'pub_date', 'id'],
+                name='comment_review_pub_date_idx'),
+        ]
         ordering = ('pub_date',)
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
 
     def __str__(self):
         return self.text
+
+
+class OutgoingEmail(models.Model):
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS = ((PENDING, 'pending'), (SENT, 'sent'), (FAILED, 'failed'))
+    subject = models.CharField(max_length=200, verbose_name='Тема')
+    message = models.TextField(verbose_name='Текст письма')
+    from_email = models.EmailField(verbose_name='Отправитель')
+    recipient = models.EmailField(verbose_name='Получатель')
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS,
+        default=PENDING,
+        verbose_name='Статус')
+    attempts = models.PositiveSmallIntegerField(
+        default=0, verbose_name='Попыток отправки')
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now, verbose_name='Следующая попытка')
+    last_error = models.TextField(blank=True, verbose_name='Последняя ошибка')
+    created = models.DateTimeField(
+        auto_now_add=True, verbose_name='Дата создания')
+    sent_at = models.DateTimeField(
+        null=True, blank=True, verbose_name='Дата отправки')
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['status', 'next_attempt_at'],
+                name='outgoing_email_queue_idx'),
+        ]
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
@@ -0,0 +1,50 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .models import Review, Title, TitleScoreStats
+
+# Массовое изменение каталога в обход сигналов моделей
+catalogue_changed = Signal()
+# Пересчёт таблицы рейтингов командой refresh_leaderboards
+leaderboards_refreshed = Signal()
+
+
+def add_score(title_id, score, delta):
+    """
+    Добавляет (delta=1) или убирает (delta=-1) оценку произведения
+    """
+    if title_id is None:
+        return
+    Title.objects.filter(pk=title_id).apply_scores(delta, delta * score)
+    TitleScoreStats.objects.apply_score(title_id, score, delta)
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        add_score(instance.title_id, instance.score, 1)
+        return
+    old_title_id, old_score = getattr(
+        instance, '_loaded_score', None) or (None, None)
+    if old_score is None:
+        Title.objects.filter(
+            pk__in=[pk for pk in (old_title_id, instance.title_id) if pk]
+        ).rebuild_ratings()
+    elif old_title_id == instance.title_id:
+        if old_score != instance.score and instance.title_id is not None:
+            Title.objects.filter(pk=instance.title_id).apply_scores(
+                0, instance.score - old_score)
+            TitleScoreStats.objects.apply_score(
+                instance.title_id, old_score, -1)
+            TitleScoreStats.objects.apply_score(
+                instance.title_id, instance.score, 1)
+    else:
+        add_score(old_title_id, old_score, -1)
+        add_score(instance.title_id, instance.score, 1)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    add_score(instance.title_id, instance.score, -1)
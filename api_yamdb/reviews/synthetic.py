@@ -0,0 +1,85 @@
+"""
+Синтетический каталог для нагрузочных прогонов: одинаковый набор данных
+при одинаковых параметрах и seed
+"""
+import random
+
+from django.db import transaction
+
+from .models import Category, Comment, Genre, Review, Title, User
+from .signals import catalogue_changed
+
+GenreTitle = Title.genre.through
+PREFIX = 'bench'
+
+
+def generate(users=50, titles=200, categories=5, genres=10,
+             reviews_per_title=10, comments_per_review=2, seed=1,
+             batch_size=None):
+    """
+    Создаёт пользователей, категории, жанры, произведения с жанрами,
+    отзывы и комментарии. Возвращает число созданных объектов по моделям
+    """
+    rnd = random.Random(seed)
+    reviews_per_title = min(reviews_per_title, users)
+    with transaction.atomic():
+        Category.objects.bulk_create(
+            (Category(name=f'c{number}', slug=f'{PREFIX}-c{number}')
+             for number in range(categories)),
+            batch_size=batch_size)
+        Genre.objects.bulk_create(
+            (Genre(name=f'g{number}', slug=f'{PREFIX}-g{number}')
+             for number in range(genres)),
+            batch_size=batch_size)
+        User.objects.bulk_create(
+            (User(username=f'{PREFIX}_user{number}',
+                  email=f'{PREFIX}_user{number}@yamdb.com')
+             for number in range(users)),
+            batch_size=batch_size)
+        category_ids = list(Category.objects.filter(
+            slug__startswith=f'{PREFIX}-').values_list('pk', flat=True))
+        genre_ids = list(Genre.objects.filter(
+            slug__startswith=f'{PREFIX}-').values_list('pk', flat=True))
+        user_ids = list(User.objects.filter(
+            username__startswith=f'{PREFIX}_').values_list('pk', flat=True))
+
+        Title.objects.bulk_create(
+            (Title(name=f'{PREFIX} title {number}',
+                   year=rnd.randint(1950, 2020),
+                   description='-',
+                   category_id=rnd.choice(category_ids))
+             for number in range(titles)),
+            batch_size=batch_size)
+        title_ids = list(Title.objects.filter(
+            name__startswith=f'{PREFIX} title ').values_list('pk', flat=True))
+        GenreTitle.objects.bulk_create(
+            (GenreTitle(title_id=title_id, genre_id=genre_id)
+             for title_id in title_ids
+             for genre_id in rnd.sample(
+                 genre_ids, min(len(genre_ids), rnd.randint(1, 3)))),
+            batch_size=batch_size)
+
+        Review.objects.bulk_create(
+            (Review(title_id=title_id, author_id=author_id, text='-',
+                    score=rnd.randint(1, 10))
+             for title_id in title_ids
+             for author_id in rnd.sample(user_ids, reviews_per_title)),
+            batch_size=batch_size)
+        review_ids = list(Review.objects.filter(
+            title__in=title_ids).values_list('pk', flat=True))
+        Comment.objects.bulk_create(
+            (Comment(review_id=review_id, author_id=rnd.choice(user_ids),
+                     text='-')
+             for review_id in review_ids
+             for _ in range(comments_per_review)),
+            batch_size=batch_size)
+        Title.objects.filter(pk__in=title_ids).rebuild_ratings()
+    catalogue_changed.send(sender=generate)
+    return {
+        'users': len(user_ids),
+        'categories': len(category_ids),
+        'genres': len(genre_ids),
+        'titles': len(title_ids),
+        'reviews': len(review_ids),
+        'comments': len(review_ids) * comments_per_review,
+    }